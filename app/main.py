@@ -1,10 +1,10 @@
 """
 Main application file for Person Detection System
 """
-import gc
 import os
 import asyncio
-from fastapi import FastAPI, Request, Response
+import json
+from fastapi import FastAPI, Request, Response, WebSocket, WebSocketDisconnect
 from fastapi.responses import HTMLResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
@@ -13,7 +13,16 @@ import time
 import numpy as np
 from app.utils.camera import Camera
 from app.models.detector import PersonDetector
+from app.models.tracker import PersonTracker
 from app.utils.database import Database
+from app.utils.write_behind import DetectionWriteQueue
+from app.utils.hub import DetectionHub
+from app.utils.motion import MotionGate
+from app.utils.governor import InferenceGovernor
+from app.utils.camera_manager import CameraManager
+from app.utils.broadcaster import StreamClient
+from app.utils.scheduler import InferenceScheduler
+from app.utils.metrics import REGISTRY, STAGE_SECONDS
 
 # Set CPU affinity to dual-core for optimization
 try:
@@ -35,25 +44,131 @@ app.mount("/static", StaticFiles(directory="app/static"), name="static")
 # Initialize templates
 templates = Jinja2Templates(directory="app/templates")
 
-# Initialize camera and detector
-camera = Camera()
-detector = PersonDetector()
+# Initialize cameras; the default camera backs the single-camera endpoints
+DEFAULT_CAMERA = "0"
+camera_manager = CameraManager()
+camera = camera_manager.add_camera(DEFAULT_CAMERA)
 
-# Initialize database
+# One model in memory serves every camera
+detector = PersonDetector(backend="auto", num_threads=2)
+detectors = [detector]
+
+# Initialize database; detections are committed in batches
 db = Database()
+detection_queue = DetectionWriteQueue(db)
+
+# Background inference time-sliced across cameras (5 FPS cap per camera)
+scheduler = InferenceScheduler(
+    camera_manager, detectors, target_fps=5,
+    motion_gate_factory=MotionGate, tracker_factory=PersonTracker
+)
+detection_writer_task = None
+retention_task = None
+startup_task = None
+
+# Live results fanned out to SSE clients without polling
+hub = DetectionHub()
+SSE_HEARTBEAT = 15.0
+
+
+def connect_channel(camera_id):
+    """Forward a camera's detection results to the hub."""
+    channel = scheduler.get_channel(camera_id)
+    channel.store.add_listener(lambda result: hub.publish_threadsafe(camera_id, result))
+
+
+for _camera_id in scheduler.channels:
+    connect_channel(_camera_id)
+
+# Scale inference and streaming down when the Pi runs hot or falls behind
+governor = InferenceGovernor(
+    scheduler, detector, temperature_reader=lambda: get_cpu_temperature()
+)
+governor_task = None
+
+# Readiness of each component, filled in as background startup completes
+readiness = {"database": False, "camera": False, "detector": False}
+
+
+async def detection_writer():
+    """Persist each new detection result published for every camera."""
+    last_seqs = {}
+    while True:
+        for camera_id, channel in list(scheduler.channels.items()):
+            result = channel.store.get()
+            if result is not None and result["seq"] != last_seqs.get(camera_id):
+                last_seqs[camera_id] = result["seq"]
+                detection_queue.submit(
+                    result["count"], result["confidence"], camera_id, result["timestamp"]
+                )
+        await asyncio.sleep(1.0 / scheduler.target_fps)
+
+
+async def initialize_database():
+    """Open the database and start persisting detections."""
+    global detection_writer_task, retention_task
+    await db.initialize()
+    readiness["database"] = True
+    detection_queue.start()
+    detection_writer_task = asyncio.create_task(detection_writer())
+    retention_task = asyncio.create_task(db.run_retention())
+
+
+async def initialize_camera():
+    """Open all cameras without blocking the event loop."""
+    loop = asyncio.get_event_loop()
+    started = await loop.run_in_executor(None, camera_manager.start_all)
+    readiness["camera"] = any(started.values())
+
+
+async def initialize_detector():
+    """Load the model and run a warm-up inference off the event loop."""
+    loop = asyncio.get_event_loop()
+    await loop.run_in_executor(None, detector.warm_up)
+    readiness["detector"] = True
+
+
+async def initialize_components():
+    """Bring up database, camera and detector concurrently."""
+    results = await asyncio.gather(
+        initialize_database(),
+        initialize_camera(),
+        initialize_detector(),
+        return_exceptions=True,
+    )
+    for result in results:
+        if isinstance(result, Exception):
+            print(f"Startup failed: {result}")
+    
+    if readiness["detector"]:
+        global governor_task
+        scheduler.start()
+        governor_task = asyncio.create_task(governor.run())
+
 
 @app.on_event("startup")
 async def startup_event():
-    """Initialize components on startup."""
-    await db.initialize()
-    camera.start()
-    detector.load_model()
+    """Start component initialization in the background."""
+    global startup_task
+    hub.bind(asyncio.get_event_loop())
+    # Serve requests immediately; /health reports readiness
+    startup_task = asyncio.create_task(initialize_components())
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Clean up resources on shutdown."""
-    camera.release()
+    if startup_task:
+        startup_task.cancel()
+    if governor_task:
+        governor_task.cancel()
+    if detection_writer_task:
+        detection_writer_task.cancel()
+    if retention_task:
+        retention_task.cancel()
+    scheduler.stop()
+    camera_manager.release_all()
+    await detection_queue.stop()
     await db.close()
 
 
@@ -97,13 +212,50 @@ async def errors(request: Request):
 async def health():
     """Return system health status."""
     return {
-        "status": "ok",
+        "status": "ok" if all(readiness.values()) else "starting",
+        "ready": readiness,
         "memory_usage": f"{get_memory_usage()} MB",
         "temperature": get_cpu_temperature(),
         "storage": get_storage_usage(),
+        "detection": scheduler.get_info(),
+        "detector": detector.get_info(),
+        "governor": governor.get_info(),
+        "cameras": camera_manager.get_info(),
+        "pipeline_ms": STAGE_SECONDS.summary(),
+        "persistence": detection_queue.get_info(),
+        "retention": db.last_retention,
+        "hub": hub.get_info(),
     }
 
 
+def collect_camera_metrics():
+    """Per-camera counters read from the cameras at scrape time."""
+    captured, dropped, clients, fps = [], [], [], []
+    for camera_id, source in camera_manager.items():
+        labels = {"camera": camera_id}
+        captured.append((labels, source.frame_seq))
+        dropped.append((labels, source.frames_dropped))
+        fps.append((labels, round(source.fps, 2)))
+        broadcaster = camera_manager.get_broadcaster(camera_id)
+        if broadcaster is not None:
+            clients.append((labels, broadcaster.clients))
+    return [
+        ("person_detection_frames_captured_total", "counter", "Frames captured per camera", captured),
+        ("person_detection_frames_dropped_total", "counter", "Stale frames dropped per camera", dropped),
+        ("person_detection_camera_fps", "gauge", "Capture rate per camera", fps),
+        ("person_detection_stream_clients", "gauge", "Connected MJPEG clients per camera", clients),
+    ]
+
+
+REGISTRY.add_collector(collect_camera_metrics)
+
+
+@app.get("/metrics")
+async def metrics():
+    """Pipeline metrics in Prometheus text exposition format."""
+    return Response(content=REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+
 @app.get("/api/settings")
 async def get_settings():
     """Get current application settings."""
@@ -134,13 +286,25 @@ async def update_settings(settings: dict):
     
     # Update detector settings
     if 'detection' in settings:
-        confidence = settings['detection'].get('confidence')
-        if confidence is not None:
-            detector.set_confidence_threshold(float(confidence))
-            
-        use_coral = settings['detection'].get('use_coral')
-        if use_coral is not None:
-            detector.set_coral_enabled(use_coral)
+        for pool_detector in detectors:
+            confidence = settings['detection'].get('confidence')
+            if confidence is not None:
+                pool_detector.set_confidence_threshold(float(confidence))
+                
+            tiles = settings['detection'].get('tiles')
+            if tiles:
+                cols, rows = map(int, str(tiles).split('x'))
+                pool_detector.set_tiling(cols, rows)
+                governor.tiling_changed()
+                
+            if 'regions' in settings['detection']:
+                pool_detector.set_regions(settings['detection']['regions'])
+                
+            use_coral = settings['detection'].get('use_coral')
+            if use_coral is not None:
+                # Reloading the model takes seconds; keep the event loop free
+                loop = asyncio.get_event_loop()
+                await loop.run_in_executor(None, pool_detector.set_coral_enabled, use_coral)
     
     # Save all settings to database
     await db.save_settings(settings)
@@ -170,14 +334,18 @@ async def test_camera(type: str, resolution: str, url: str = None):
     else:
         return {"status": "error", "message": "Invalid camera type or missing URL"}
     
-    # Try to start camera
+    # Try to start camera; an unreachable IP camera still starts its
+    # reconnect loop, so check the capture itself
     success = test_camera.start()
+    cap = test_camera.cap
     
-    if not success:
+    if not success or cap is None or not cap.isOpened():
+        test_camera.release()
         return {"status": "error", "message": "Failed to connect to camera"}
     
-    # Get a test frame
-    frame = test_camera.read()
+    # Wait for the first frame instead of reading before one was captured
+    entry = await test_camera.wait_for_frame_async(0, timeout=5.0)
+    frame = entry[2] if entry is not None else None
     test_camera.release()
     
     if frame is None:
@@ -186,16 +354,51 @@ async def test_camera(type: str, resolution: str, url: str = None):
     return {"status": "ok", "resolution": f"{frame.shape[1]}x{frame.shape[0]}"}
 
 
-@app.get("/api/stream")
-async def video_stream():
-    """Provide MJPEG video stream."""
+def unknown_camera(camera_id):
+    """Error payload for requests naming an unregistered camera."""
+    return {"status": "error", "message": f"Unknown camera: {camera_id}"}
+
+
+def mjpeg_stream(camera_id, fps=None, scale=1.0, quality=90, auto=False):
+    """Build the MJPEG streaming response for a camera."""
+    stream_camera = camera_manager.get(camera_id)
+    broadcaster = camera_manager.get_broadcaster(camera_id)
+    client = StreamClient(
+        fps=fps if fps is not None else governor.max_stream_fps,
+        scale=scale, quality=quality, auto=auto
+    )
+    
     async def generate():
-        while True:
-            yield (b'--frame\r\n'
-                  b'Content-Type: image/jpeg\r\n\r\n' + 
-                  camera.get_frame_jpeg() + b'\r\n')
-            # Throttle to maintain performance
-            await asyncio.sleep(0.1)  # Max 10 FPS for stream
+        broadcaster.clients += 1
+        try:
+            while True:
+                # Sleep until the camera publishes a new frame (a blank
+                # placeholder is sent once if the camera is not delivering)
+                entry = await stream_camera.wait_for_frame_async(
+                    client.last_seq or 0, timeout=1.0, decode=False
+                )
+                if camera_manager.get(camera_id) is not stream_camera:
+                    break  # Camera was removed
+                if entry is None and client.last_seq is not None:
+                    continue
+                
+                # Always the newest shared JPEG; frames published while the
+                # previous one was being written are skipped, not queued
+                interval = client.interval(governor.stream_fps)
+                started = time.time()
+                seq, jpeg = await broadcaster.get_jpeg_async(client.quality, client.scale)
+                if jpeg is not None and seq != client.last_seq:
+                    broadcaster.frames_skipped += client.skipped(seq)
+                    client.last_seq = seq
+                    yield (b'--frame\r\n'
+                          b'Content-Type: image/jpeg\r\n\r\n' + 
+                          jpeg + b'\r\n')
+                    client.record_write(started, interval)
+                
+                # Throttle to the client's rate, capped by the governor
+                await asyncio.sleep(max(interval - (time.time() - started), 0))
+        finally:
+            broadcaster.clients -= 1
                   
     return StreamingResponse(
         generate(),
@@ -203,34 +406,68 @@ async def video_stream():
     )
 
 
-@app.get("/api/detect")
-async def detect_frame():
-    """Get current frame with detection results."""
-    frame = camera.read()
-    
-    if frame is None:
-        return {"error": "No frame available"}
-    
-    # Run detection at reduced rate (5 FPS max)
-    detection_results = detector.detect(frame)
-    boxes = detector.filter_detections(detection_results)
+@app.get("/api/stream")
+async def video_stream(fps: float = None, scale: float = 1.0, quality: int = 90, auto: bool = False):
+    """
+    Provide MJPEG video stream of the default camera.
     
-    # Draw bounding boxes
-    annotated_frame = detector.draw_boxes(frame, boxes)
+    fps, scale and quality tune the stream per client; auto lowers quality
+    and size while the client cannot keep up.
+    """
+    return mjpeg_stream(DEFAULT_CAMERA, fps, scale, quality, auto)
+
+
+@app.get("/api/cameras/{camera_id}/stream")
+async def camera_video_stream(camera_id: str, fps: float = None, scale: float = 1.0,
+                              quality: int = 90, auto: bool = False):
+    """Provide MJPEG video stream of a camera."""
+    if camera_manager.get(camera_id) is None:
+        return unknown_camera(camera_id)
+    return mjpeg_stream(camera_id, fps, scale, quality, auto)
+
+
+def detection_payload(result):
+    """Build the overlay payload sent to browsers for a detection result."""
+    return {
+        "seq": result["seq"],
+        "timestamp": result["timestamp"],
+        "count": result["count"],
+        "confidence": round(result["confidence"], 3),
+        "time": result["latency_ms"],
+        "width": result["width"],
+        "height": result["height"],
+        # [x, y, w, h, confidence] or, when tracking, [..., track_id]
+        "boxes": result.get("tracks", result["boxes"]),
+    }
+
+
+def latest_detection(camera_id, annotate=False):
+    """Latest detection payload of a camera, or an annotated JPEG."""
+    channel = scheduler.get_channel(camera_id)
+    if channel is None:
+        return unknown_camera(camera_id)
     
-    # Count persons
-    person_count = len(boxes)
+    if not annotate:
+        result = channel.store.get()
+        if result is None:
+            return {"error": "No detection available"}
+        return detection_payload(result)
     
-    # Calculate average confidence
-    avg_confidence = 0
-    if person_count > 0:
-        avg_confidence = sum(box[4] for box in boxes) / person_count
+    # Tracks are extrapolated to the current frame so annotated output can
+    # run faster than inference
+    frame = channel.camera.read()
     
-    # Store detection in database
-    await db.store_detection(person_count, avg_confidence)
+    if frame is None:
+        return {"error": "No frame available"}
     
-    # Memory management
-    gc.collect()
+    # Draw bounding boxes
+    if channel.tracker is not None:
+        boxes = channel.tracker.extrapolate(time.time())
+    else:
+        result = channel.store.get()
+        boxes = result["boxes"] if result else []
+    with STAGE_SECONDS.time("overlay"):
+        annotated_frame = detector.overlay_boxes(frame, boxes)
     
     # Convert to JPEG
     _, jpeg = cv2.imencode('.jpg', annotated_frame)
@@ -241,49 +478,327 @@ async def detect_frame():
     )
 
 
-@app.get("/api/count")
-async def person_count_sse():
+@app.get("/api/detect")
+async def detect_frame(annotate: bool = False):
     """
-    Server-Sent Events endpoint for real-time person count updates.
+    Get the latest detection result of the default camera.
+    
+    Returns box coordinates for the browser to draw on top of the MJPEG
+    stream. With annotate=true the current frame is returned as a JPEG with
+    tracked boxes drawn server-side instead.
+    """
+    return latest_detection(DEFAULT_CAMERA, annotate)
+
+
+@app.get("/api/cameras/{camera_id}/detect")
+async def camera_detect_frame(camera_id: str, annotate: bool = False):
+    """Get the latest detection result of a camera."""
+    return latest_detection(camera_id, annotate)
+
+
+async def subscribe_events(camera_id, format_event):
+    """
+    Yield SSE messages for a camera's results as the hub publishes them.
+    
+    format_event returns the message for a result, or None to skip it. A
+    comment line is sent as keepalive when nothing was published for a
+    while, and the stream ends if the hub evicts this subscriber.
     """
-    async def event_generator():
+    queue = hub.subscribe(camera_id)
+    try:
+        while True:
+            try:
+                result = await asyncio.wait_for(queue.get(), SSE_HEARTBEAT)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            if result is None:
+                break  # Evicted for falling behind; the browser reconnects
+            message = format_event(result)
+            if message is not None:
+                yield message
+    except asyncio.CancelledError:
+        # Handle client disconnection
+        pass
+    finally:
+        hub.unsubscribe(camera_id, queue)
+
+
+def detection_events(camera_id):
+    """Build the overlay SSE response for a camera."""
+    def format_event(result):
+        payload = json.dumps(detection_payload(result))
+        return f"event: detection\ndata: {payload}\n\n"
+
+    return StreamingResponse(
+        subscribe_events(camera_id, format_event),
+        media_type="text/event-stream"
+    )
+
+
+@app.get("/api/detections/stream")
+async def detection_stream_sse():
+    """
+    Server-Sent Events endpoint publishing boxes for the client-side overlay.
+    """
+    return detection_events(DEFAULT_CAMERA)
+
+
+@app.get("/api/cameras/{camera_id}/detections/stream")
+async def camera_detection_stream_sse(camera_id: str):
+    """Server-Sent Events endpoint publishing boxes of a camera."""
+    if scheduler.get_channel(camera_id) is None:
+        return unknown_camera(camera_id)
+    return detection_events(camera_id)
+
+
+def frame_metadata(channel, seq, timestamp, client):
+    """Metadata sent ahead of a WebSocket frame, with boxes for that frame."""
+    result = channel.store.get()
+    metadata = {
+        "type": "frame",
+        "seq": seq,
+        "timestamp": timestamp,
+        "fps": client.fps,
+        "quality": client.quality,
+        "scale": client.scale,
+    }
+    if result is None:
+        metadata.update({"count": 0, "confidence": 0.0, "time": 0, "boxes": [],
+                         "width": None, "height": None, "detection_seq": None})
+        return metadata
+    
+    metadata.update(detection_payload(result))
+    metadata.update({"seq": seq, "timestamp": timestamp, "detection_seq": result["seq"]})
+    if channel.tracker is not None:
+        # Move tracked boxes to where they are at this frame's capture time
+        metadata["boxes"] = channel.tracker.extrapolate(timestamp).tolist()
+    return metadata
+
+
+async def websocket_stream(websocket, camera_id):
+    """
+    Stream JPEG frames and their detection metadata over one WebSocket.
+    
+    Every frame is a text message with JSON metadata followed by a binary
+    message with the JPEG. The client may send JSON such as
+    {"fps": 5, "scale": 0.5, "quality": 70, "auto": true} at any time to
+    change its stream settings.
+    """
+    await websocket.accept()
+    channel = scheduler.get_channel(camera_id)
+    stream_camera = camera_manager.get(camera_id)
+    broadcaster = camera_manager.get_broadcaster(camera_id)
+    if channel is None or stream_camera is None:
+        await websocket.send_text(json.dumps(unknown_camera(camera_id)))
+        await websocket.close()
+        return
+    
+    params = websocket.query_params
+    try:
+        client = StreamClient(
+            fps=float(params.get("fps", governor.max_stream_fps)),
+            scale=float(params.get("scale", 1.0)),
+            quality=int(params.get("quality", 90)),
+            auto=params.get("auto", "false").lower() == "true",
+        )
+    except ValueError:
+        await websocket.close(code=1008)
+        return
+    
+    async def receive_settings():
         try:
-            last_count = -1
             while True:
-                # Get latest detection from database
-                latest = await db.get_latest_detection()
-                count = latest.get("count", 0) if latest else 0
-                
-                # Only send updates when count changes
-                if count != last_count:
-                    last_count = count
-                    yield f"data: {{\n"
-                    yield f"data: \"count\": {count},\n"
-                    yield f"data: \"timestamp\": {int(time.time())},\n"
-                    yield f"data: \"confidence\": {latest.get('confidence', 0) if latest else 0}\n"
-                    yield f"data: }}\n\n"
-                
-                # Wait between checks to avoid database load
-                await asyncio.sleep(0.5)
-        except asyncio.CancelledError:
-            # Handle client disconnection
-            pass
+                try:
+                    message = json.loads(await websocket.receive_text())
+                    settings = StreamClient(
+                        fps=message.get("fps", client.fps),
+                        scale=message.get("scale", client.max_scale),
+                        quality=message.get("quality", client.max_quality),
+                        auto=bool(message.get("auto", client.auto)),
+                    )
+                except (ValueError, TypeError, AttributeError):
+                    continue  # Ignore malformed settings
+                client.fps, client.auto = settings.fps, settings.auto
+                client.max_scale = client.scale = settings.max_scale
+                client.max_quality = client.quality = settings.max_quality
+        except WebSocketDisconnect:
+            pass  # The send loop stops once this task is done
+    
+    receiver = asyncio.create_task(receive_settings())
+    broadcaster.clients += 1
+    try:
+        while not receiver.done():
+            entry = await stream_camera.wait_for_frame_async(
+                client.last_seq or 0, timeout=1.0, decode=False
+            )
+            if camera_manager.get(camera_id) is not stream_camera:
+                await websocket.close()  # Camera was removed
+                break
+            if entry is None:
+                continue
+            
+            # Newest frame only; slow clients skip frames instead of queueing
+            interval = client.interval(governor.stream_fps)
+            started = time.time()
+            seq, jpeg = await broadcaster.get_jpeg_async(client.quality, client.scale)
+            if jpeg is not None and seq != client.last_seq:
+                timestamp = stream_camera.frame_time(seq) or entry[1]
+                broadcaster.frames_skipped += client.skipped(seq)
+                client.last_seq = seq
+                await websocket.send_text(json.dumps(frame_metadata(channel, seq, timestamp, client)))
+                await websocket.send_bytes(jpeg)
+                client.record_write(started, interval)
+            
+            await asyncio.sleep(max(interval - (time.time() - started), 0))
+    except (WebSocketDisconnect, RuntimeError):
+        pass  # Client went away mid-send
+    finally:
+        broadcaster.clients -= 1
+        receiver.cancel()
+
+
+@app.websocket("/api/ws/stream")
+async def websocket_video_stream(websocket: WebSocket):
+    """WebSocket stream of the default camera with detection metadata."""
+    await websocket_stream(websocket, DEFAULT_CAMERA)
+
+
+@app.websocket("/api/cameras/{camera_id}/ws")
+async def camera_websocket_stream(websocket: WebSocket, camera_id: str):
+    """WebSocket stream of a camera with detection metadata."""
+    await websocket_stream(websocket, camera_id)
+
+
+def count_events(camera_id):
+    """Build the person count SSE response for a camera."""
+    last_count = None
+    
+    def format_event(result):
+        nonlocal last_count
+        # Only send updates when count changes
+        if result["count"] == last_count:
+            return None
+        last_count = result["count"]
+        payload = json.dumps({
+            "camera_id": camera_id,
+            "count": result["count"],
+            "confidence": round(result["confidence"], 3),
+            "timestamp": int(result["timestamp"]),
+        })
+        return f"event: detection\ndata: {payload}\n\n"
 
     return StreamingResponse(
-        event_generator(),
+        subscribe_events(camera_id, format_event),
         media_type="text/event-stream"
     )
 
 
+@app.get("/api/count")
+async def person_count_sse():
+    """
+    Server-Sent Events endpoint for real-time person count updates.
+    """
+    return count_events(DEFAULT_CAMERA)
+
+
+@app.get("/api/cameras/{camera_id}/count")
+async def camera_person_count_sse(camera_id: str):
+    """Server-Sent Events endpoint for a camera's person count."""
+    if scheduler.get_channel(camera_id) is None:
+        return unknown_camera(camera_id)
+    return count_events(camera_id)
+
+
 @app.get("/api/detections/history")
-async def get_detection_history(days: int = 7):
-    """Get historical detection data for the specified number of days."""
+async def get_detection_history(days: float = 7, hours: float = None):
+    """
+    Get historical detection data for the specified number of days.
+
+    Passing hours instead selects a shorter range, which is served from
+    per-minute buckets when it fits in the point budget.
+    """
+    if hours is not None:
+        days = hours / 24
     history = await db.get_detection_history(days)
     return {
         "history": history
     }
 
 
+@app.get("/api/cameras/{camera_id}/history")
+async def get_camera_detection_history(camera_id: str, days: float = 7, hours: float = None):
+    """Get historical detection data of a camera over days or hours."""
+    if hours is not None:
+        days = hours / 24
+    history = await db.get_detection_history(days, camera_id=camera_id)
+    return {
+        "camera_id": camera_id,
+        "history": history
+    }
+
+
+@app.get("/api/cameras")
+async def list_cameras():
+    """List registered cameras with capture and inference state."""
+    schedule = scheduler.get_info()["cameras"]
+    cameras = camera_manager.get_info()
+    for camera_id, info in cameras.items():
+        info["detection"] = schedule.get(camera_id)
+    return {"cameras": cameras}
+
+
+@app.post("/api/cameras")
+async def add_camera(camera_data: dict):
+    """Register and start an additional camera."""
+    camera_id = str(camera_data.get("id", "")).strip()
+    if not camera_id:
+        return {"status": "error", "message": "Missing camera id"}
+    
+    resolution = (640, 480)
+    if camera_data.get("resolution"):
+        try:
+            resolution = tuple(map(int, camera_data["resolution"].split('x')))
+        except (ValueError, TypeError):
+            return {"status": "error", "message": "Invalid resolution format"}
+    
+    try:
+        priority = float(camera_data.get("priority", 1.0))
+    except (ValueError, TypeError):
+        priority = float("nan")
+    if not 0 < priority < float("inf"):
+        return {"status": "error", "message": "Priority must be a positive number"}
+    
+    try:
+        new_camera = camera_manager.add_camera(
+            camera_id, camera_data.get("source", 0), resolution,
+            mjpeg_passthrough=bool(camera_data.get("mjpeg_passthrough", False))
+        )
+    except ValueError as e:
+        return {"status": "error", "message": str(e)}
+    
+    scheduler.add_camera(camera_id, priority)
+    connect_channel(camera_id)
+    loop = asyncio.get_event_loop()
+    if not await loop.run_in_executor(None, new_camera.start):
+        # Leave no half-registered camera behind so the id can be reused
+        scheduler.remove_camera(camera_id)
+        camera_manager.remove_camera(camera_id)
+        return {"status": "error", "message": "Failed to connect to camera"}
+    return {"status": "ok", "camera_id": camera_id}
+
+
+@app.delete("/api/cameras/{camera_id}")
+async def remove_camera(camera_id: str):
+    """Stop and unregister a camera."""
+    if camera_id == DEFAULT_CAMERA:
+        return {"status": "error", "message": "The default camera cannot be removed"}
+    scheduler.remove_camera(camera_id)
+    if not camera_manager.remove_camera(camera_id):
+        return unknown_camera(camera_id)
+    return {"status": "ok"}
+
+
 @app.get("/api/logs/system")
 async def get_system_logs(limit: int = 100):
     """Get system logs with pagination."""
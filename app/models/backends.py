@@ -0,0 +1,385 @@
+"""
+Inference backends for the person detector
+"""
+import os
+import time
+import numpy as np
+
+
+def import_tflite():
+    """
+    Import the TFLite interpreter module
+
+    Prefers the standalone tflite_runtime package, which loads in a fraction
+    of the time and memory of full TensorFlow, and falls back to TensorFlow's
+    bundled interpreter only when it is not installed.
+
+    Returns:
+        module: Module providing Interpreter, load_delegate and OpResolverType
+    """
+    try:
+        from tflite_runtime import interpreter as tflite
+    except ImportError:
+        from tensorflow.lite.python import interpreter as tflite
+    return tflite
+
+
+class InferenceBackend:
+    """
+    Base class for SSD inference engines
+
+    A backend owns the model and its input buffer. The detector resizes
+    frames directly into input_view() and then calls invoke(), which returns
+    raw SSD outputs in the TFLite layout: normalized [y1, x1, y2, x2] boxes,
+    0-based COCO class IDs and scores.
+    """
+    name = "base"
+
+    def __init__(self, model_path, num_threads=None):
+        """
+        Initialize the backend
+
+        Args:
+            model_path (str): Path to the model file
+            num_threads (int): Number of CPU threads, or None for the engine default
+        """
+        self.model_path = model_path
+        self.num_threads = num_threads
+        self.input_shape = None
+        self.input_dtype = np.uint8
+        self.loaded = False
+
+    def is_available(self):
+        """
+        Check whether the engine and model file are present on this host
+
+        Returns:
+            bool: True if load() can be expected to succeed
+        """
+        return os.path.exists(self.model_path)
+
+    def load(self):
+        """Load the model and allocate the input buffer"""
+        raise NotImplementedError
+
+    def input_view(self):
+        """
+        Get a writable (H, W, 3) view of the model input
+
+        Callers must not keep the view across invoke().
+
+        Returns:
+            numpy.ndarray: Input buffer
+        """
+        raise NotImplementedError
+
+    def invoke(self):
+        """
+        Run inference on the current input buffer
+
+        Returns:
+            tuple: (boxes (K, 4), classes (K,), scores (K,))
+        """
+        raise NotImplementedError
+
+    def get_info(self):
+        """
+        Get backend information
+
+        Returns:
+            dict: Dictionary with backend configuration
+        """
+        return {
+            "name": self.name,
+            "model_path": self.model_path,
+            "num_threads": self.num_threads,
+            "loaded": self.loaded,
+        }
+
+
+class TFLiteBackend(InferenceBackend):
+    """
+    TensorFlow Lite interpreter with optional XNNPACK and Coral Edge TPU delegates
+    """
+    name = "tflite"
+
+    def __init__(self, model_path, num_threads=None, use_xnnpack=True, use_coral=False):
+        """
+        Initialize the backend
+
+        Args:
+            model_path (str): Path to the TFLite model file
+            num_threads (int): Number of interpreter threads
+            use_xnnpack (bool): Keep the default XNNPACK delegate enabled
+            use_coral (bool): Offload to a Coral USB Accelerator
+        """
+        super().__init__(model_path, num_threads)
+        self.use_xnnpack = use_xnnpack
+        self.use_coral = use_coral
+        self.interpreter = None
+        self._input_tensor = None
+
+    def is_available(self):
+        """Check for the model file and a TFLite interpreter"""
+        if not super().is_available():
+            return False
+        try:
+            import_tflite()
+            return True
+        except ImportError:
+            return False
+
+    def load(self):
+        """Load the TFLite model"""
+        tflite = import_tflite()
+
+        kwargs = {"model_path": self.model_path, "num_threads": self.num_threads}
+        if self.use_coral:
+            kwargs["experimental_delegates"] = [tflite.load_delegate("libedgetpu.so.1")]
+        if not self.use_xnnpack:
+            kwargs["experimental_op_resolver_type"] = (
+                tflite.OpResolverType.BUILTIN_WITHOUT_DEFAULT_DELEGATES
+            )
+
+        self.interpreter = tflite.Interpreter(**kwargs)
+        self.interpreter.allocate_tensors()
+
+        input_details = self.interpreter.get_input_details()[0]
+        self.output_details = self.interpreter.get_output_details()
+        self.input_shape = tuple(int(v) for v in input_details['shape'][1:3])
+        self.input_dtype = input_details['dtype']
+
+        # Accessor for a view onto the interpreter's own input buffer
+        self._input_tensor = self.interpreter.tensor(input_details['index'])
+        self.loaded = True
+
+    def input_view(self):
+        """Get a view of the interpreter's input tensor"""
+        return self._input_tensor()[0]
+
+    def invoke(self):
+        """Run the interpreter and read the SSD outputs"""
+        self.interpreter.invoke()
+
+        # Assuming standard TFLite SSD model with these outputs
+        boxes = self.interpreter.get_tensor(self.output_details[0]['index'])[0]  # Bounding boxes
+        classes = self.interpreter.get_tensor(self.output_details[1]['index'])[0]  # Class IDs
+        scores = self.interpreter.get_tensor(self.output_details[2]['index'])[0]  # Confidence scores
+        return boxes, classes, scores
+
+    def get_info(self):
+        """Get backend information including delegates"""
+        info = super().get_info()
+        info.update({"xnnpack": self.use_xnnpack, "coral": self.use_coral})
+        return info
+
+
+class OpenCVDNNBackend(InferenceBackend):
+    """
+    OpenCV DNN module running a TensorFlow SSD graph (.pb with .pbtxt config)
+    """
+    name = "opencv"
+
+    def __init__(self, model_path, config_path=None, num_threads=None, input_shape=(300, 300)):
+        """
+        Initialize the backend
+
+        Args:
+            model_path (str): Path to the frozen graph (.pb)
+            config_path (str): Path to the text graph (.pbtxt), defaults next to the model
+            num_threads (int): Number of OpenCV threads
+            input_shape (tuple): Model input (height, width)
+        """
+        super().__init__(model_path, num_threads)
+        self.config_path = config_path or os.path.splitext(model_path)[0] + ".pbtxt"
+        self.input_shape = tuple(input_shape)
+        self.net = None
+        self._input = None
+
+    def is_available(self):
+        """Check for the model and config files"""
+        return super().is_available() and os.path.exists(self.config_path)
+
+    def load(self):
+        """Load the network"""
+        import cv2
+
+        if self.num_threads:
+            cv2.setNumThreads(self.num_threads)
+        self.net = cv2.dnn.readNetFromTensorflow(self.model_path, self.config_path)
+        self.net.setPreferableBackend(cv2.dnn.DNN_BACKEND_OPENCV)
+        self.net.setPreferableTarget(cv2.dnn.DNN_TARGET_CPU)
+        self._input = np.zeros((self.input_shape[0], self.input_shape[1], 3), dtype=np.uint8)
+        self.loaded = True
+
+    def input_view(self):
+        """Get the preallocated input buffer"""
+        return self._input
+
+    def invoke(self):
+        """Run the network and convert its [1, 1, K, 7] output"""
+        import cv2
+
+        blob = cv2.dnn.blobFromImage(self._input)
+        self.net.setInput(blob)
+        detections = self.net.forward()[0, 0]
+
+        # Rows are [image_id, class_id (1-based), score, x1, y1, x2, y2]
+        boxes = detections[:, [4, 3, 6, 5]]
+        classes = detections[:, 1] - 1
+        scores = detections[:, 2]
+        return boxes, classes, scores
+
+
+class ONNXRuntimeBackend(InferenceBackend):
+    """
+    ONNX Runtime session for an SSD model exported with tf2onnx
+    """
+    name = "onnx"
+
+    def __init__(self, model_path, num_threads=None, input_shape=(300, 300)):
+        """
+        Initialize the backend
+
+        Args:
+            model_path (str): Path to the ONNX model
+            num_threads (int): Number of intra-op threads
+            input_shape (tuple): Input (height, width) used when the model's is dynamic
+        """
+        super().__init__(model_path, num_threads)
+        self.input_shape = tuple(input_shape)
+        self.session = None
+        self._input = None
+
+    def is_available(self):
+        """Check for the model file and onnxruntime"""
+        if not super().is_available():
+            return False
+        try:
+            import onnxruntime  # noqa: F401
+            return True
+        except ImportError:
+            return False
+
+    def load(self):
+        """Create the inference session"""
+        import onnxruntime
+
+        options = onnxruntime.SessionOptions()
+        if self.num_threads:
+            options.intra_op_num_threads = self.num_threads
+        self.session = onnxruntime.InferenceSession(
+            self.model_path, options, providers=["CPUExecutionProvider"]
+        )
+
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        height, width = model_input.shape[1:3]
+        if isinstance(height, int) and isinstance(width, int):
+            self.input_shape = (height, width)
+
+        # Locate SSD outputs by name, their order differs between exports
+        names = [output.name for output in self.session.get_outputs()]
+        self.output_names = [
+            next(name for name in names if key in name)
+            for key in ("boxes", "classes", "scores")
+        ]
+
+        self._input = np.zeros((1, self.input_shape[0], self.input_shape[1], 3), dtype=np.uint8)
+        self.loaded = True
+
+    def input_view(self):
+        """Get the preallocated input buffer"""
+        return self._input[0]
+
+    def invoke(self):
+        """Run the session"""
+        boxes, classes, scores = self.session.run(self.output_names, {self.input_name: self._input})
+        return boxes[0], classes[0] - 1, scores[0]
+
+
+BACKENDS = {
+    TFLiteBackend.name: TFLiteBackend,
+    OpenCVDNNBackend.name: OpenCVDNNBackend,
+    ONNXRuntimeBackend.name: ONNXRuntimeBackend,
+}
+
+
+def create_backend(name, model_path, **kwargs):
+    """
+    Create a backend by name
+
+    Args:
+        name (str): One of BACKENDS
+        model_path (str): Path to the model file
+        **kwargs: Backend-specific options
+
+    Returns:
+        InferenceBackend: Unloaded backend instance
+    """
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown inference backend: {name}")
+    return BACKENDS[name](model_path, **kwargs)
+
+
+def benchmark_backend(backend, runs=10, warmup=2):
+    """
+    Time inference on synthetic frames
+
+    Args:
+        backend (InferenceBackend): Loaded backend
+        runs (int): Number of timed inferences
+        warmup (int): Untimed inferences run first
+
+    Returns:
+        float: Median inference time in milliseconds
+    """
+    rng = np.random.default_rng(0)
+    timings = []
+
+    for i in range(warmup + runs):
+        view = backend.input_view()
+        view[...] = rng.integers(0, 256, size=view.shape, dtype=np.uint8)
+        del view
+
+        started = time.perf_counter()
+        backend.invoke()
+        if i >= warmup:
+            timings.append((time.perf_counter() - started) * 1000)
+
+    return float(np.median(timings))
+
+
+def select_fastest_backend(candidates, runs=10, warmup=2):
+    """
+    Load every available candidate and keep the one with the lowest latency
+
+    Args:
+        candidates (list): InferenceBackend instances to compare
+        runs (int): Number of timed inferences per backend
+        warmup (int): Untimed inferences per backend
+
+    Returns:
+        tuple: (fastest loaded backend, dict of backend name to median ms)
+    """
+    results = {}
+    best = None
+
+    for backend in candidates:
+        if not backend.is_available():
+            continue
+        try:
+            backend.load()
+            results[backend.name] = round(benchmark_backend(backend, runs, warmup), 2)
+        except Exception as e:
+            print(f"Backend {backend.name} unavailable: {e}")
+            continue
+
+        if best is None or results[backend.name] < results[best.name]:
+            best = backend
+
+    if best is None:
+        raise RuntimeError("No inference backend available")
+
+    print(f"Selected inference backend {best.name}: {results}")
+    return best, results
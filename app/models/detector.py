@@ -2,22 +2,63 @@
 Person detector module using SSD-MobileNetV2 model
 """
 import os
+import threading
 import cv2
 import numpy as np
-import tensorflow as tf
-from tensorflow.lite.python.interpreter import Interpreter
+from app.models.backends import (
+    BACKENDS,
+    OpenCVDNNBackend,
+    TFLiteBackend,
+    create_backend,
+    select_fastest_backend,
+)
+from app.models.tracker import iou_matrix
+from app.utils.metrics import STAGE_SECONDS
+
+
+def non_max_suppression(boxes, iou_threshold=0.5):
+    """
+    Remove overlapping duplicate boxes, keeping the most confident ones
+    
+    Args:
+        boxes (numpy.ndarray): (N, 5) boxes [x, y, w, h, confidence]
+        iou_threshold (float): Overlap above which a weaker box is suppressed
+        
+    Returns:
+        numpy.ndarray: Kept boxes, ordered by descending confidence
+    """
+    if len(boxes) < 2:
+        return boxes
+    
+    boxes = boxes[np.argsort(-boxes[:, 4], kind="stable")]
+    overlaps = iou_matrix(boxes, boxes) >= iou_threshold
+    
+    # Each kept box suppresses every weaker box it overlaps
+    keep = np.ones(len(boxes), dtype=bool)
+    for i in range(len(boxes) - 1):
+        if keep[i]:
+            keep[i + 1:] &= ~overlaps[i, i + 1:]
+    
+    return boxes[keep]
+
 
 class PersonDetector:
     """
     Person detector class using SSD-MobileNetV2 quantized model
     """
-    def __init__(self, model_path=None, confidence_threshold=0.5):
+    def __init__(self, model_path=None, confidence_threshold=0.5, letterbox=False,
+                 backend="tflite", num_threads=None, use_xnnpack=True, use_coral=False):
         """
         Initialize the person detector
         
         Args:
             model_path (str): Path to the TFLite model file
             confidence_threshold (float): Confidence threshold for detections
+            letterbox (bool): Preserve aspect ratio by padding instead of stretching
+            backend (str): Inference backend name, or "auto" to benchmark all
+            num_threads (int): CPU threads used by the backend
+            use_xnnpack (bool): Enable the XNNPACK delegate for TFLite
+            use_coral (bool): Use a Coral USB Accelerator with TFLite
         """
         if model_path is None:
             # Default to models directory
@@ -28,102 +69,474 @@ class PersonDetector:
         
         self.model_path = model_path
         self.confidence_threshold = confidence_threshold
-        self.interpreter = None
-        self.input_details = None
-        self.output_details = None
+        self.backend_name = backend
+        self.backend = None
+        self.benchmark_results = None
+        self.num_threads = num_threads
+        self.use_xnnpack = use_xnnpack
+        self.use_coral = use_coral
+        self.input_shape = None
+        self.input_dtype = None
         self.person_class_id = 0  # COCO dataset: 0 is person
+        self.letterbox = letterbox
+        self.letterbox_color = 0
+        
+        # Preprocessing buffers, allocated once the input shape is known
+        self._resize_buffer = None
+        self._letterbox_buffers = {}
+        
+        # Tiling and region-of-interest configuration
+        self.tile_grid = None
+        self.tile_overlap = 0.2
+        self.regions = None
+        self.nms_threshold = 0.5
+        
+        # Held for a whole inference batch and for backend swaps
+        self.lock = threading.RLock()
+    
+    def set_tiling(self, cols, rows, overlap=0.2):
+        """
+        Split frames into a grid of overlapping tiles for inference
+        
+        Args:
+            cols (int): Number of tile columns (1 with rows=1 disables tiling)
+            rows (int): Number of tile rows
+            overlap (float): Fraction of a tile shared with its neighbour
+        """
+        cols, rows = max(int(cols), 1), max(int(rows), 1)
+        with self.lock:
+            self.tile_grid = None if cols == 1 and rows == 1 else (cols, rows)
+            self.tile_overlap = min(max(float(overlap), 0.0), 0.9)
+    
+    def set_regions(self, regions):
+        """
+        Restrict detection to regions of interest
+        
+        Args:
+            regions (list): Normalized [x, y, w, h] rectangles, or None for the full frame
+        """
+        if not regions:
+            regions = None
+        else:
+            regions = np.clip(np.asarray(regions, dtype=np.float32).reshape(-1, 4), 0, 1)
+        with self.lock:
+            self.regions = regions
+    
+    def get_windows(self, width, height):
+        """
+        Compute the pixel windows inference runs on for a frame size
+        
+        Tiles that do not intersect any region of interest are skipped.
+        
+        Args:
+            width (int): Frame width
+            height (int): Frame height
+            
+        Returns:
+            numpy.ndarray: (T, 4) integer windows [x, y, w, h]
+        """
+        frame = np.array([width, height, width, height], dtype=np.float32)
+        
+        if self.tile_grid is None:
+            if self.regions is None:
+                return np.array([[0, 0, width, height]], dtype=np.int32)
+            windows = self.regions * frame
+        else:
+            cols, rows = self.tile_grid
+            tile_w = width / (cols - (cols - 1) * self.tile_overlap)
+            tile_h = height / (rows - (rows - 1) * self.tile_overlap)
+            xs = np.arange(cols) * tile_w * (1 - self.tile_overlap)
+            ys = np.arange(rows) * tile_h * (1 - self.tile_overlap)
+            grid_x, grid_y = np.meshgrid(xs, ys)
+            windows = np.stack([
+                grid_x.ravel(),
+                grid_y.ravel(),
+                np.full(grid_x.size, tile_w),
+                np.full(grid_x.size, tile_h),
+            ], axis=1)
+            
+            # Skip tiles entirely outside the regions of interest
+            if self.regions is not None:
+                windows = windows[(iou_matrix(windows, self.regions * frame) > 0).any(axis=1)]
+        
+        windows = np.round(windows).astype(np.int32)
+        windows[:, 2] = np.minimum(windows[:, 2], width - windows[:, 0])
+        windows[:, 3] = np.minimum(windows[:, 3], height - windows[:, 1])
+        return windows[(windows[:, 2] > 1) & (windows[:, 3] > 1)]
     
     def load_model(self):
         """
-        Load the TFLite model
+        Load the model into the configured inference backend
+        
+        With backend="auto" every available backend is benchmarked on
+        synthetic frames and the fastest one is kept. The new backend is
+        loaded alongside the current one and swapped in between inferences,
+        so this can run in an executor while detection continues.
+        """
+        benchmark_results = self.benchmark_results
+        if self.backend_name == "auto":
+            backend, benchmark_results = select_fastest_backend(self._backend_candidates())
+        else:
+            backend = self._create_backend(self.backend_name)
+            
+            # Check if model file exists
+            if not os.path.exists(backend.model_path):
+                raise FileNotFoundError(f"Model file not found: {backend.model_path}")
+            
+            backend.load()
+        
+        # Scratch buffer for models that need float conversion after resizing
+        resize_buffer = None
+        if backend.input_dtype != np.uint8:
+            resize_buffer = np.empty(
+                (backend.input_shape[0], backend.input_shape[1], 3), dtype=np.uint8
+            )
+        
+        with self.lock:
+            self.backend = backend
+            self.benchmark_results = benchmark_results
+            
+            # Get model input shape
+            self.input_shape = backend.input_shape
+            self.input_dtype = backend.input_dtype
+            self._resize_buffer = resize_buffer
+            self._letterbox_buffers = {}
+        
+        print(f"Model loaded on {backend.name} backend with input shape: {self.input_shape}")
+    
+    def warm_up(self):
+        """
+        Run one inference on a blank frame
+        
+        The first invoke allocates scratch memory and packs weights, so doing
+        it ahead of time keeps that cost off the first real detection.
+        """
+        if self.backend is None:
+            self.load_model()
+        height, width = self.input_shape
+        self.detect_batch([np.zeros((height, width, 3), dtype=np.uint8)])
+    
+    def _create_backend(self, name):
+        """
+        Create an unloaded backend with this detector's options
+        
+        Args:
+            name (str): Backend name
+            
+        Returns:
+            InferenceBackend: Backend instance
+        """
+        if name == "tflite":
+            model_path = self.model_path
+            if self.use_coral:
+                model_path = os.path.splitext(self.model_path)[0] + "_edgetpu.tflite"
+            return TFLiteBackend(
+                model_path,
+                num_threads=self.num_threads,
+                use_xnnpack=self.use_xnnpack,
+                use_coral=self.use_coral,
+            )
+        
+        # Other engines load sibling model files exported from the same network
+        base_path = os.path.splitext(self.model_path)[0]
+        if name == "opencv":
+            return OpenCVDNNBackend(base_path + ".pb", num_threads=self.num_threads)
+        return create_backend(name, base_path + ".onnx", num_threads=self.num_threads)
+    
+    def _backend_candidates(self):
+        """Create every known backend for benchmarking"""
+        return [self._create_backend(name) for name in BACKENDS]
+    
+    def set_backend(self, name):
+        """
+        Switch inference backend, reloading the model if it was loaded
+        
+        Blocks while the model loads; call it from an executor in async code.
+        
+        Args:
+            name (str): Backend name, or "auto" to benchmark and pick the fastest
+        """
+        if name != "auto" and name not in BACKENDS:
+            raise ValueError(f"Unknown inference backend: {name}")
+        self.backend_name = name
+        if self.backend is not None:
+            self.load_model()
+    
+    def set_coral_enabled(self, enabled):
         """
-        # Check if model file exists
-        if not os.path.exists(self.model_path):
-            raise FileNotFoundError(f"Model file not found: {self.model_path}")
+        Enable or disable the Coral USB Accelerator
         
-        # Load TFLite model
-        self.interpreter = Interpreter(model_path=self.model_path)
-        self.interpreter.allocate_tensors()
+        Blocks while the model reloads; call it from an executor in async code.
         
-        # Get input and output details
-        self.input_details = self.interpreter.get_input_details()
-        self.output_details = self.interpreter.get_output_details()
+        Args:
+            enabled (bool): Use the Edge TPU delegate with the TFLite backend
+        """
+        enabled = bool(enabled)
+        if enabled == self.use_coral:
+            return
+        self.use_coral = enabled
+        if enabled:
+            self.backend_name = "tflite"
+        if self.backend is not None:
+            self.load_model()
+    
+    def set_confidence_threshold(self, threshold):
+        """
+        Set confidence threshold for detections
         
-        # Get model input shape
-        self.input_shape = self.input_details[0]['shape'][1:3]
+        Args:
+            threshold (float): Minimum score in [0, 1]
+        """
+        self.confidence_threshold = min(max(float(threshold), 0.0), 1.0)
+    
+    def get_info(self):
+        """
+        Get detector information
         
-        print(f"Model loaded with input shape: {self.input_shape}")
+        Returns:
+            dict: Dictionary with backend and configuration details
+        """
+        return {
+            "backend": self.backend.get_info() if self.backend is not None else None,
+            "benchmark_ms": self.benchmark_results,
+            "confidence_threshold": self.confidence_threshold,
+            "tiles": self.tile_grid,
+            "letterbox": self.letterbox,
+        }
     
-    def preprocess_image(self, image):
+    def set_input(self, image):
         """
-        Preprocess image for inference
+        Resize an image directly into the backend's input buffer
+        
+        Avoids per-frame allocations and the extra copy made by
+        set_tensor(). The buffer view is only held for the
+        duration of this call, as the TFLite interpreter refuses to invoke
+        while references to its internal buffers are alive.
         
         Args:
             image (numpy.ndarray): Input image
             
         Returns:
-            numpy.ndarray: Preprocessed image
+            tuple: (scale, offset) arrays of [y, x] mapping normalized model
+                coordinates back to image pixels
         """
-        # Resize to model's expected input dimensions
-        resized = cv2.resize(image, (self.input_shape[1], self.input_shape[0]))
+        img_height, img_width = image.shape[:2]
+        in_height, in_width = int(self.input_shape[0]), int(self.input_shape[1])
+        is_quantized = self.input_dtype == np.uint8
+        target = self.backend.input_view()
         
-        # Convert to uint8 if needed by quantized model
-        if self.input_details[0]['dtype'] == np.uint8:
-            input_data = np.expand_dims(resized, axis=0).astype(np.uint8)
-        else:
-            # Convert to float and normalize to [-1,1] or [0,1] depending on model
-            input_data = np.expand_dims(resized, axis=0).astype(np.float32) / 255.0
+        if not self.letterbox:
+            if is_quantized:
+                cv2.resize(image, (in_width, in_height), dst=target)
+            else:
+                cv2.resize(image, (in_width, in_height), dst=self._resize_buffer)
+                np.multiply(self._resize_buffer, np.float32(1 / 255.0), out=target)
             
-        return input_data
+            scale = np.array([img_height, img_width], dtype=np.float32)
+            offset = np.zeros(2, dtype=np.float32)
+            return scale, offset
+        
+        # Letterbox: fit the whole image inside the input, centered and padded
+        ratio = min(in_width / img_width, in_height / img_height)
+        new_width = max(1, int(round(img_width * ratio)))
+        new_height = max(1, int(round(img_height * ratio)))
+        top = (in_height - new_height) // 2
+        left = (in_width - new_width) // 2
+        
+        scratch = self._letterbox_buffers.get((new_height, new_width))
+        if scratch is None:
+            scratch = np.empty((new_height, new_width, 3), dtype=np.uint8)
+            self._letterbox_buffers[(new_height, new_width)] = scratch
+        cv2.resize(image, (new_width, new_height), dst=scratch)
+        
+        region = target[top:top + new_height, left:left + new_width]
+        if is_quantized:
+            target.fill(self.letterbox_color)
+            region[...] = scratch
+        else:
+            target.fill(self.letterbox_color / 255.0)
+            np.multiply(scratch, np.float32(1 / 255.0), out=region)
+        
+        # Undo the padding and ratio when mapping boxes back to the image
+        scale = np.array([in_height / ratio, in_width / ratio], dtype=np.float32)
+        offset = np.array([-top / ratio, -left / ratio], dtype=np.float32)
+        return scale, offset
+    
+    def get_input_size(self):
+        """
+        Get the (width, height) frames can be pre-scaled to before detect()
+        
+        Returns:
+            tuple: Model input size, or None when frames must be passed at
+                full size (letterboxing, tiling or regions of interest)
+        """
+        if self.input_shape is None or self.letterbox:
+            return None
+        if self.tile_grid is not None or self.regions is not None:
+            return None
+        return int(self.input_shape[1]), int(self.input_shape[0])
     
-    def detect(self, image):
+    def detect(self, image, source_size=None):
         """
         Detect persons in the image
         
         Args:
             image (numpy.ndarray): Input image
+            source_size (tuple): (width, height) of the frame the image was
+                downscaled from; boxes are returned in its coordinates. A
+                pre-scaled image is never tiled, even if tiling was enabled
+                after the caller checked get_input_size()
             
         Returns:
-            list: List of detected boxes [x, y, w, h, confidence]
+            numpy.ndarray: Array of shape (N, 5) with rows [x, y, w, h, confidence]
         """
-        if self.interpreter is None:
-            self.load_model()
+        if source_size is not None:
+            return self.detect_batch([image], [source_size])[0]
+        with self.lock:
+            if self.tile_grid is not None or self.regions is not None:
+                return self.detect_tiled(image)
+            return self.detect_batch([image])[0]
+    
+    def detect_tiled(self, image):
+        """
+        Detect persons tile by tile and merge the results in frame coordinates
+        
+        Args:
+            image (numpy.ndarray): Input image
             
-        # Get image dimensions for scaling
+        Returns:
+            numpy.ndarray: Array of shape (N, 5) with rows [x, y, w, h, confidence]
+        """
         img_height, img_width = image.shape[:2]
         
-        # Preprocess image
-        input_data = self.preprocess_image(image)
+        # Windows and the region filter must see the same configuration
+        with self.lock:
+            regions = self.regions
+            windows = self.get_windows(img_width, img_height)
+            if len(windows) == 0:
+                return np.empty((0, 5), dtype=np.float32)
+            
+            # Crops are views into the frame, no copies are made
+            crops = [image[y:y + h, x:x + w] for x, y, w, h in windows]
+            results = self.detect_batch(crops)
         
-        # Set input tensor
-        self.interpreter.set_tensor(self.input_details[0]['index'], input_data)
+        # Shift each tile's boxes by the tile origin
+        counts = [len(r) for r in results]
+        boxes = np.concatenate(results)
+        boxes[:, :2] += np.repeat(windows[:, :2], counts, axis=0)
         
-        # Run inference
-        self.interpreter.invoke()
+        # Drop boxes centered outside every region of interest
+        if regions is not None and len(boxes):
+            regions = regions * np.array(
+                [img_width, img_height, img_width, img_height], dtype=np.float32
+            )
+            cx = (boxes[:, 0] + boxes[:, 2] / 2)[:, None]
+            cy = (boxes[:, 1] + boxes[:, 3] / 2)[:, None]
+            inside = (
+                (cx >= regions[:, 0]) & (cx <= regions[:, 0] + regions[:, 2]) &
+                (cy >= regions[:, 1]) & (cy <= regions[:, 1] + regions[:, 3])
+            )
+            boxes = boxes[inside.any(axis=1)]
         
-        # Get output tensors
-        # Assuming standard TFLite SSD model with these outputs
-        boxes = self.interpreter.get_tensor(self.output_details[0]['index'])[0]  # Bounding boxes
-        classes = self.interpreter.get_tensor(self.output_details[1]['index'])[0]  # Class IDs
-        scores = self.interpreter.get_tensor(self.output_details[2]['index'])[0]  # Confidence scores
+        # Merge duplicates from overlapping tiles
+        return non_max_suppression(boxes, self.nms_threshold)
+    
+    def detect_batch(self, frames, source_sizes=None):
+        """
+        Detect persons in several frames and post-process them together
         
-        result_boxes = []
+        The SSD post-processing op baked into the model only supports a batch
+        size of one, so frames are invoked back to back while their raw
+        outputs are collected into a single batch for vectorized filtering.
         
-        for i in range(len(scores)):
-            if scores[i] >= self.confidence_threshold and classes[i] == self.person_class_id:
-                # TFLite SSD models output [y1, x1, y2, x2] normalized
-                box = boxes[i]
+        Args:
+            frames (list): List of input images (may differ in size)
+            source_sizes (list): Optional (width, height) per frame that boxes
+                are mapped to instead of the image's own size
+            
+        Returns:
+            list: One (N, 5) array of [x, y, w, h, confidence] per frame
+        """
+        # Backend swaps wait for the whole batch, and vice versa
+        with self.lock:
+            if self.backend is None:
+                self.load_model()
+            
+            if len(frames) == 0:
+                return []
+            
+            batch_boxes = None
+            batch_classes = None
+            batch_scores = None
+            scales = np.empty((len(frames), 2), dtype=np.float32)
+            offsets = np.empty((len(frames), 2), dtype=np.float32)
+            
+            for i, frame in enumerate(frames):
+                # Resize straight into the input tensor
+                with STAGE_SECONDS.time("preprocess"):
+                    scales[i], offsets[i] = self.set_input(frame)
+                if source_sizes is not None:
+                    # Map pre-scaled images back to the frame they came from
+                    height, width = frame.shape[:2]
+                    ratio = np.array(
+                        [source_sizes[i][1] / height, source_sizes[i][0] / width], dtype=np.float32
+                    )
+                    scales[i] *= ratio
+                    offsets[i] *= ratio
                 
-                # Convert to [x, y, w, h] format and scale to image dimensions
-                x = int(box[1] * img_width)
-                y = int(box[0] * img_height)
-                w = int((box[3] - box[1]) * img_width)
-                h = int((box[2] - box[0]) * img_height)
+                # Run inference
+                with STAGE_SECONDS.time("invoke"):
+                    boxes, classes, scores = self.backend.invoke()
                 
-                # Add confidence
-                result_boxes.append([x, y, w, h, scores[i]])
+                if batch_boxes is None:
+                    batch_boxes = np.empty((len(frames),) + boxes.shape, dtype=np.float32)
+                    batch_classes = np.empty((len(frames),) + classes.shape, dtype=np.float32)
+                    batch_scores = np.empty((len(frames),) + scores.shape, dtype=np.float32)
+                
+                batch_boxes[i] = boxes
+                batch_classes[i] = classes
+                batch_scores[i] = scores
+            
+            with STAGE_SECONDS.time("postprocess"):
+                return self.postprocess(batch_boxes, batch_classes, batch_scores, scales, offsets)
+    
+    def postprocess(self, boxes, classes, scores, scales, offsets=None):
+        """
+        Filter and convert raw SSD outputs for a batch of frames in one pass
+        
+        Args:
+            boxes (numpy.ndarray): (B, K, 4) normalized [y1, x1, y2, x2] boxes
+            classes (numpy.ndarray): (B, K) class IDs
+            scores (numpy.ndarray): (B, K) confidence scores
+            scales (numpy.ndarray): (B, 2) [y, x] pixels per normalized unit,
+                the frame [height, width] unless letterboxed
+            offsets (numpy.ndarray): (B, 2) [y, x] pixel offsets, or None
+            
+        Returns:
+            list: One (N, 5) float32 array of [x, y, w, h, confidence] per frame
+        """
+        # Keep person detections above the confidence threshold
+        mask = (scores >= self.confidence_threshold) & (classes == self.person_class_id)
+        
+        # Scale normalized [y1, x1, y2, x2] coordinates to each frame's pixels
+        frame_idx = np.nonzero(mask)[0]
+        scale = np.tile(np.asarray(scales, dtype=np.float32), 2)
+        scaled = boxes[mask] * scale[frame_idx]
+        if offsets is not None:
+            scaled += np.tile(np.asarray(offsets, dtype=np.float32), 2)[frame_idx]
+        
+        # Convert to [x, y, w, h, confidence], truncating like int()
+        result = np.empty((len(scaled), 5), dtype=np.float32)
+        result[:, 0] = scaled[:, 1]
+        result[:, 1] = scaled[:, 0]
+        result[:, 2] = scaled[:, 3] - scaled[:, 1]
+        result[:, 3] = scaled[:, 2] - scaled[:, 0]
+        np.trunc(result[:, :4], out=result[:, :4])
+        result[:, 4] = scores[mask]
         
-        return result_boxes
+        # Split the compact result back into per-frame arrays
+        counts = mask.sum(axis=1)
+        return np.split(result, np.cumsum(counts)[:-1])
     
     def overlay_boxes(self, image, boxes):
         """
@@ -131,7 +544,8 @@ class PersonDetector:
         
         Args:
             image (numpy.ndarray): Input image
-            boxes (list): List of boxes [x, y, w, h, confidence]
+            boxes (numpy.ndarray): Array of boxes [x, y, w, h, confidence],
+                optionally followed by a track ID
             
         Returns:
             numpy.ndarray: Image with bounding boxes
@@ -151,13 +565,16 @@ class PersonDetector:
         )
         
         for box in boxes:
-            x, y, w, h, confidence = box
+            x, y, w, h = (int(v) for v in box[:4])
+            confidence = float(box[4])
             
             # Draw bounding box
             cv2.rectangle(result, (x, y), (x + w, y + h), (0, 255, 0), 2)
             
-            # Draw label with confidence
+            # Draw label with confidence (and track ID when tracked)
             label = f"Person: {confidence:.2f}"
+            if len(box) > 5:
+                label = f"#{int(box[5])} {label}"
             label_size, _ = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.5, 1)
             cv2.rectangle(result, (x, y - 20), (x + label_size[0], y), (0, 255, 0), -1)
             cv2.putText(
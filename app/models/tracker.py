@@ -0,0 +1,292 @@
+"""
+Multi-object tracker for person detections (SORT-style, pure NumPy)
+"""
+import threading
+import time
+import numpy as np
+
+
+def iou_matrix(boxes_a, boxes_b):
+    """
+    Compute pairwise intersection-over-union between two sets of boxes
+
+    Args:
+        boxes_a (numpy.ndarray): (N, 4+) boxes [x, y, w, h, ...]
+        boxes_b (numpy.ndarray): (M, 4+) boxes [x, y, w, h, ...]
+
+    Returns:
+        numpy.ndarray: (N, M) IoU matrix
+    """
+    a = np.asarray(boxes_a, dtype=np.float32)[:, None, :4]
+    b = np.asarray(boxes_b, dtype=np.float32)[None, :, :4]
+
+    inter_w = np.minimum(a[..., 0] + a[..., 2], b[..., 0] + b[..., 2]) - np.maximum(a[..., 0], b[..., 0])
+    inter_h = np.minimum(a[..., 1] + a[..., 3], b[..., 1] + b[..., 3]) - np.maximum(a[..., 1], b[..., 1])
+    inter = np.clip(inter_w, 0, None) * np.clip(inter_h, 0, None)
+    union = a[..., 2] * a[..., 3] + b[..., 2] * b[..., 3] - inter
+
+    return inter / np.maximum(union, 1e-6)
+
+
+def _boxes_to_measurements(boxes):
+    """Convert [x, y, w, h] boxes to [cx, cy, area, aspect] measurements"""
+    boxes = np.asarray(boxes, dtype=np.float32)
+    w = np.maximum(boxes[:, 2], 1e-3)
+    h = np.maximum(boxes[:, 3], 1e-3)
+    return np.stack([boxes[:, 0] + w / 2, boxes[:, 1] + h / 2, w * h, w / h], axis=1)
+
+
+def _states_to_boxes(states):
+    """Convert [cx, cy, area, aspect, ...] states to [x, y, w, h] boxes"""
+    area = np.maximum(states[:, 2], 1e-3)
+    w = np.sqrt(area * np.maximum(states[:, 3], 1e-3))
+    h = area / w
+    return np.stack([states[:, 0] - w / 2, states[:, 1] - h / 2, w, h], axis=1)
+
+
+class PersonTracker:
+    """
+    Tracks detected persons across frames with constant-velocity Kalman filters
+
+    All tracks are stored in stacked arrays so prediction and correction run
+    as batched matrix operations. Time steps are measured in seconds, which
+    lets the tracker be updated at the inference rate while predicting at a
+    higher streaming rate.
+    """
+    def __init__(self, iou_threshold=0.3, max_age=3, min_hits=2, count_smoothing=0.3):
+        """
+        Initialize the tracker
+
+        Args:
+            iou_threshold (float): Minimum IoU for a detection to match a track
+            max_age (int): Updates a track may go unmatched before removal
+            min_hits (int): Matches needed before a track is reported
+            count_smoothing (float): Weight of the newest count in the moving average
+        """
+        self.iou_threshold = iou_threshold
+        self.max_age = max_age
+        self.min_hits = min_hits
+        self.count_smoothing = count_smoothing
+        self.lock = threading.Lock()
+
+        # State is [cx, cy, area, aspect, vcx, vcy, varea]
+        self.states = np.zeros((0, 7), dtype=np.float32)
+        self.covariances = np.zeros((0, 7, 7), dtype=np.float32)
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.hits = np.zeros(0, dtype=np.int32)
+        self.misses = np.zeros(0, dtype=np.int32)
+        self.confidences = np.zeros(0, dtype=np.float32)
+
+        self.next_id = 1
+        self.updates = 0
+        self.last_time = None
+        self.smoothed_count = 0.0
+
+        # Measurement model and noise (values follow the SORT reference)
+        self.measurement_matrix = np.eye(4, 7, dtype=np.float32)
+        self.measurement_noise = np.diag([1, 1, 10, 0.01]).astype(np.float32)
+        self.process_noise = np.diag([1, 1, 1, 1, 0.01, 0.01, 0.0001]).astype(np.float32)
+        self.initial_covariance = np.diag([10, 10, 10, 10, 10000, 10000, 10000]).astype(np.float32)
+
+    @property
+    def count(self):
+        """Smoothed number of tracked persons"""
+        return int(round(self.smoothed_count))
+
+    def reset(self):
+        """Remove all tracks"""
+        with self.lock:
+            self.states = self.states[:0]
+            self.covariances = self.covariances[:0]
+            self.ids = self.ids[:0]
+            self.hits = self.hits[:0]
+            self.misses = self.misses[:0]
+            self.confidences = self.confidences[:0]
+            self.updates = 0
+            self.last_time = None
+            self.smoothed_count = 0.0
+
+    def _transition(self, dt):
+        """Build the constant-velocity transition matrix for a time step"""
+        transition = np.eye(7, dtype=np.float32)
+        transition[0, 4] = transition[1, 5] = transition[2, 6] = dt
+        return transition
+
+    def _advance(self, now):
+        """Predict all tracks forward to the given time"""
+        dt = 0.0 if self.last_time is None else max(now - self.last_time, 0.0)
+        self.last_time = now
+        if len(self.states) == 0 or dt == 0:
+            return
+
+        # Stop shrinking boxes from collapsing to a negative area
+        collapsing = self.states[:, 2] + self.states[:, 6] * dt <= 0
+        self.states[collapsing, 6] = 0
+
+        transition = self._transition(dt)
+        self.states = self.states @ transition.T
+        self.covariances = transition @ self.covariances @ transition.T + self.process_noise * dt
+
+    def _associate(self, detections):
+        """
+        Greedily match detections to tracks by descending IoU
+
+        Returns:
+            tuple: (matched track indices, matched detection indices)
+        """
+        if len(self.states) == 0 or len(detections) == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+        ious = iou_matrix(_states_to_boxes(self.states), detections)
+        track_idx, det_idx = np.nonzero(ious >= self.iou_threshold)
+        order = np.argsort(-ious[track_idx, det_idx], kind="stable")
+
+        used_tracks = set()
+        used_dets = set()
+        matched_tracks = []
+        matched_dets = []
+        for t, d in zip(track_idx[order], det_idx[order]):
+            if t in used_tracks or d in used_dets:
+                continue
+            used_tracks.add(t)
+            used_dets.add(d)
+            matched_tracks.append(t)
+            matched_dets.append(d)
+
+        return np.array(matched_tracks, dtype=np.int64), np.array(matched_dets, dtype=np.int64)
+
+    def _correct(self, track_idx, measurements):
+        """Apply the Kalman measurement update to the matched tracks"""
+        states = self.states[track_idx]
+        covariances = self.covariances[track_idx]
+
+        innovation_cov = covariances[:, :4, :4] + self.measurement_noise
+        gain = covariances[:, :, :4] @ np.linalg.inv(innovation_cov)
+        residual = measurements - states[:, :4]
+
+        self.states[track_idx] = states + (gain @ residual[:, :, None])[:, :, 0]
+        self.covariances[track_idx] = covariances - gain @ covariances[:, :4, :]
+
+    def _confirmed(self):
+        """Mask of tracks with enough matches to be trusted"""
+        return (self.hits >= self.min_hits) | (self.updates <= self.min_hits)
+
+    def _reported(self):
+        """
+        Mask of tracks reported to callers
+
+        Tracks that missed the latest update are kept for re-matching but
+        not shown, so predicted boxes agree with the published count.
+        """
+        return self._confirmed() & (self.misses == 0)
+
+    def _tracks_array(self, states, mask):
+        """Build the [x, y, w, h, confidence, track_id] output array"""
+        result = np.empty((int(mask.sum()), 6), dtype=np.float32)
+        result[:, :4] = _states_to_boxes(states[mask])
+        result[:, 4] = self.confidences[mask]
+        result[:, 5] = self.ids[mask]
+        return result
+
+    def _update_count(self, count):
+        """Fold the newest confirmed track count into the moving average"""
+        self.smoothed_count += self.count_smoothing * (count - self.smoothed_count)
+
+    def update(self, detections, now=None):
+        """
+        Update tracks with a new set of detections
+
+        Args:
+            detections (numpy.ndarray): (N, 5) boxes [x, y, w, h, confidence]
+            now (float): Detection time, defaults to time.time()
+
+        Returns:
+            numpy.ndarray: (M, 6) confirmed tracks [x, y, w, h, confidence, track_id]
+        """
+        if now is None:
+            now = time.time()
+        detections = np.asarray(detections, dtype=np.float32).reshape(-1, 5)
+
+        with self.lock:
+            self.updates += 1
+            self._advance(now)
+
+            track_idx, det_idx = self._associate(detections)
+            if len(track_idx):
+                self._correct(track_idx, _boxes_to_measurements(detections[det_idx]))
+                self.confidences[track_idx] = detections[det_idx, 4]
+
+            # Age unmatched tracks, refresh matched ones
+            matched = np.zeros(len(self.states), dtype=bool)
+            matched[track_idx] = True
+            self.hits[matched] += 1
+            self.misses[matched] = 0
+            self.misses[~matched] += 1
+
+            # Start new tracks for unmatched detections
+            new = np.ones(len(detections), dtype=bool)
+            new[det_idx] = False
+            if new.any():
+                count = int(new.sum())
+                new_states = np.zeros((count, 7), dtype=np.float32)
+                new_states[:, :4] = _boxes_to_measurements(detections[new])
+                self.states = np.concatenate([self.states, new_states])
+                self.covariances = np.concatenate(
+                    [self.covariances, np.broadcast_to(self.initial_covariance, (count, 7, 7))]
+                )
+                self.ids = np.concatenate([self.ids, np.arange(self.next_id, self.next_id + count)])
+                self.hits = np.concatenate([self.hits, np.ones(count, dtype=np.int32)])
+                self.misses = np.concatenate([self.misses, np.zeros(count, dtype=np.int32)])
+                self.confidences = np.concatenate([self.confidences, detections[new, 4]])
+                self.next_id += count
+
+            # Drop tracks that have not been seen for too long
+            keep = self.misses <= self.max_age
+            if not keep.all():
+                self.states = self.states[keep]
+                self.covariances = self.covariances[keep]
+                self.ids = self.ids[keep]
+                self.hits = self.hits[keep]
+                self.misses = self.misses[keep]
+                self.confidences = self.confidences[keep]
+
+            mask = self._reported()
+            self._update_count(int(mask.sum()))
+            return self._tracks_array(self.states, mask)
+
+    def predict(self, now=None):
+        """
+        Advance tracks to a frame where inference was skipped
+
+        Args:
+            now (float): Frame time, defaults to time.time()
+
+        Returns:
+            numpy.ndarray: (M, 6) predicted tracks [x, y, w, h, confidence, track_id]
+        """
+        if now is None:
+            now = time.time()
+
+        with self.lock:
+            self._advance(now)
+            mask = self._reported()
+            self._update_count(int(mask.sum()))
+            return self._tracks_array(self.states, mask)
+
+    def extrapolate(self, now=None):
+        """
+        Estimate track boxes at a given time without changing tracker state
+
+        Args:
+            now (float): Time to extrapolate to, defaults to time.time()
+
+        Returns:
+            numpy.ndarray: (M, 6) extrapolated tracks [x, y, w, h, confidence, track_id]
+        """
+        if now is None:
+            now = time.time()
+
+        with self.lock:
+            dt = 0.0 if self.last_time is None else max(now - self.last_time, 0.0)
+            states = self.states @ self._transition(dt).T
+            return self._tracks_array(states, self._reported())
@@ -14,6 +14,7 @@ const playIcon = pauseBtn.querySelector('.play-icon');
 const snapshotBtn = document.getElementById('snapshot-btn');
 const fullscreenBtn = document.getElementById('fullscreen-btn');
 const fpsIndicator = document.getElementById('fps-indicator');
+const fpsSelect = document.getElementById('fps-select');
 const currentCount = document.getElementById('current-count');
 const confidenceBar = document.getElementById('confidence-bar');
 const confidenceText = document.getElementById('confidence-text');
@@ -29,7 +30,13 @@ let lastDetection = {
   time: 0,
   boxes: []
 };
+let streamSocket = null;
+let useMjpeg = false;
 let eventSource = null;
+let pendingMetadata = null;
+let frameUrl = null;
+let pendingFrameUrl = null;
+let frameTimes = [];
 let frameRate = 5;
 
 // Initialize the page
@@ -37,7 +44,7 @@ document.addEventListener('DOMContentLoaded', () => {
   initCameraStream();
   initCameraControls();
   initDetectionRenderer();
-  initEventSource();
+  initStreamSocket();
 });
 
 // Initialize camera stream
@@ -46,9 +53,6 @@ function initCameraStream() {
   cameraFeed.onerror = () => {
     showNotification('Error loading camera feed', 'danger');
   };
-  
-  // Set camera feed source
-  cameraFeed.src = '/api/stream';
 }
 
 // Initialize camera controls
@@ -61,6 +65,11 @@ function initCameraControls() {
   
   // Fullscreen button
   fullscreenBtn.addEventListener('click', toggleFullscreen);
+  
+  // Stream frame rate
+  fpsSelect.addEventListener('change', () => {
+    setStreamFrameRate(Number(fpsSelect.value));
+  });
 }
 
 // Toggle pause/play
@@ -74,11 +83,12 @@ function togglePause() {
     pauseIcon.style.display = 'none';
     playIcon.style.display = 'inline-block';
     
-    // Stop event source
-    if (eventSource) {
-      eventSource.close();
-      eventSource = null;
+    // Stop the stream
+    if (streamSocket) {
+      streamSocket.close();
+      streamSocket = null;
     }
+    stopMjpegFallback();
   } else {
     // Resume stream
     cameraFeed.style.opacity = '1';
@@ -86,8 +96,8 @@ function togglePause() {
     pauseIcon.style.display = 'inline-block';
     playIcon.style.display = 'none';
     
-    // Restart event source
-    initEventSource();
+    // Restart the stream
+    initStreamSocket();
   }
 }
 
@@ -130,9 +140,9 @@ function takeSnapshot() {
 
 // Draw detection boxes on canvas for snapshot
 function drawBoxesOnCanvas(ctx, boxes, width, height) {
-  // Scale boxes to actual canvas size
-  const scaleX = width / cameraOverlay.width;
-  const scaleY = height / cameraOverlay.height;
+  // Scale boxes from camera frame pixels to the snapshot size
+  const scaleX = width / (lastDetection.width || width);
+  const scaleY = height / (lastDetection.height || height);
   
   // Draw boxes
   ctx.strokeStyle = '#FF3B30';
@@ -206,7 +216,7 @@ function initDetectionRenderer() {
   window.addEventListener('resize', () => {
     detectionRenderer.trackSize();
     if (lastDetection.boxes.length > 0) {
-      detectionRenderer.draw(lastDetection.boxes);
+      detectionRenderer.draw(lastDetection.boxes, lastDetection.width, lastDetection.height);
     }
   });
 }
@@ -224,10 +234,20 @@ class DetectionRenderer {
     this.ctx.canvas.height = this.img.clientHeight;
   }
 
-  draw(boxes) {
+  draw(boxes, frameWidth, frameHeight) {
     this.ctx.clearRect(0, 0, this.ctx.canvas.width, this.ctx.canvas.height);
+    
+    // Boxes arrive in camera frame pixels; scale them to the displayed size
+    const scaleX = frameWidth ? this.ctx.canvas.width / frameWidth : 1;
+    const scaleY = frameHeight ? this.ctx.canvas.height / frameHeight : 1;
+    
     boxes.forEach(box => {
-      const [x, y, w, h, confidence] = box;
+      const x = box[0] * scaleX;
+      const y = box[1] * scaleY;
+      const w = box[2] * scaleX;
+      const h = box[3] * scaleY;
+      const confidence = box[4];
+      const label = box.length > 5 ? `#${box[5]} Person: ${(confidence*100).toFixed(0)}%` : `Person: ${(confidence*100).toFixed(0)}%`;
       
       // Draw bounding box
       this.ctx.strokeStyle = '#FF3B30';
@@ -239,43 +259,126 @@ class DetectionRenderer {
       this.ctx.fillRect(x, y - 20, 120, 20);
       this.ctx.fillStyle = '#FFFFFF';
       this.ctx.font = '14px Arial';
-      this.ctx.fillText(`Person: ${(confidence*100).toFixed(0)}%`, x + 5, y - 5);
+      this.ctx.fillText(label, x + 5, y - 5);
     });
   }
 }
 
-// Initialize Server-Sent Events for real-time updates
-function initEventSource() {
-  if (isPaused || eventSource) return;
+// Initialize the WebSocket carrying frames and their detection metadata
+function initStreamSocket() {
+  if (isPaused || streamSocket) return;
+  if (useMjpeg) {
+    startMjpegFallback();
+    return;
+  }
   
-  eventSource = new EventSource('/api/count');
+  const protocol = window.location.protocol === 'https:' ? 'wss:' : 'ws:';
+  const socket = new WebSocket(`${protocol}//${window.location.host}/api/ws/stream?fps=${frameRate}&auto=true`);
+  socket.binaryType = 'blob';
+  streamSocket = socket;
+  let opened = false;
   
   // Connection opened
-  eventSource.onopen = (event) => {
-    console.log('SSE connection established');
+  socket.onopen = () => {
+    opened = true;
+    console.log('Stream connection established');
   };
   
-  // Listen for detection events
-  eventSource.addEventListener('detection', (event) => {
-    const data = JSON.parse(event.data);
-    updateDetectionDisplay(data);
-  });
-  
-  // Listen for frame rate updates
-  eventSource.addEventListener('fps', (event) => {
-    frameRate = parseFloat(event.data);
-    fpsIndicator.textContent = `${frameRate} FPS`;
-  });
+  // Each JPEG is preceded by a JSON message describing it
+  socket.onmessage = (event) => {
+    if (typeof event.data === 'string') {
+      pendingMetadata = JSON.parse(event.data);
+      return;
+    }
+    showFrame(event.data, pendingMetadata);
+    pendingMetadata = null;
+  };
   
   // Error handling
+  socket.onerror = (error) => {
+    console.error('Stream error:', error);
+  };
+  
+  socket.onclose = () => {
+    if (streamSocket === socket) {
+      streamSocket = null;
+      if (!opened) {
+        // Server without WebSocket support: use MJPEG plus SSE instead
+        console.warn('Stream socket unavailable, falling back to MJPEG');
+        useMjpeg = true;
+        startMjpegFallback();
+      } else if (!isPaused) {
+        setTimeout(initStreamSocket, 5000); // Try to reconnect after 5 seconds
+      }
+    }
+  };
+}
+
+// Show the MJPEG stream with boxes from Server-Sent Events
+function startMjpegFallback() {
+  if (isPaused) return;
+  stopMjpegFallback();
+  
+  cameraFeed.onload = null;
+  if (frameUrl) {
+    URL.revokeObjectURL(frameUrl);
+    frameUrl = null;
+  }
+  cameraFeed.src = `/api/stream?fps=${frameRate}&auto=true`;
+  fpsIndicator.textContent = `${frameRate} FPS`;
+  
+  eventSource = new EventSource('/api/detections/stream');
+  eventSource.addEventListener('detection', (event) => {
+    updateDetectionDisplay(JSON.parse(event.data));
+  });
   eventSource.onerror = (error) => {
     console.error('SSE error:', error);
-    if (eventSource.readyState === EventSource.CLOSED) {
-      setTimeout(initEventSource, 5000); // Try to reconnect after 5 seconds
-    }
   };
 }
 
+// Stop the MJPEG stream and its event source
+function stopMjpegFallback() {
+  if (eventSource) {
+    eventSource.close();
+    eventSource = null;
+  }
+  if (useMjpeg) {
+    cameraFeed.src = '';
+  }
+}
+
+// Change the server-side frame rate of the stream
+function setStreamFrameRate(fps) {
+  frameRate = fps;
+  if (streamSocket && streamSocket.readyState === WebSocket.OPEN) {
+    streamSocket.send(JSON.stringify({ fps: fps }));
+  } else if (useMjpeg && !isPaused) {
+    // MJPEG rates are fixed per request; reopen the stream
+    startMjpegFallback();
+  }
+}
+
+// Show a frame and draw its boxes once the image is on screen
+function showFrame(blob, metadata) {
+  // A frame that has not loaded yet is superseded and its onload dropped
+  if (pendingFrameUrl) URL.revokeObjectURL(pendingFrameUrl);
+  const url = URL.createObjectURL(blob);
+  pendingFrameUrl = url;
+  cameraFeed.onload = () => {
+    if (frameUrl) URL.revokeObjectURL(frameUrl);
+    frameUrl = url;
+    pendingFrameUrl = null;
+    if (metadata) updateDetectionDisplay(metadata);
+  };
+  cameraFeed.src = url;
+  
+  // Received frame rate over the last second
+  const now = performance.now();
+  frameTimes.push(now);
+  frameTimes = frameTimes.filter(t => now - t < 1000);
+  fpsIndicator.textContent = `${frameTimes.length} FPS`;
+}
+
 // Update the detection display with new data
 function updateDetectionDisplay(data) {
   if (isPaused) return;
@@ -295,6 +398,6 @@ function updateDetectionDisplay(data) {
   
   // Update overlay
   if (detectionRenderer && data.boxes) {
-    detectionRenderer.draw(data.boxes);
+    detectionRenderer.draw(data.boxes, data.width, data.height);
   }
 }
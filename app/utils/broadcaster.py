@@ -0,0 +1,226 @@
+"""
+Shared JPEG frame broadcaster for MJPEG clients
+"""
+import asyncio
+import threading
+import time
+import cv2
+import numpy as np
+from app.utils.metrics import STAGE_SECONDS
+
+
+class FrameBroadcaster:
+    """
+    Encodes each camera frame once per quality/scale variant
+
+    Every stream client asks the broadcaster for the current JPEG. The
+    encoded bytes are cached per variant together with the camera frame
+    sequence number, so all viewers of the same variant share one buffer and
+    encoding cost stays flat in the number of clients. Cameras in MJPEG
+    passthrough mode serve full-size streams without any encoding.
+    """
+    def __init__(self, camera):
+        """
+        Initialize the broadcaster
+
+        Args:
+            camera (Camera): Frame source
+        """
+        self.camera = camera
+        self.lock = threading.Lock()
+        self.cache = {}
+        self.clients = 0
+        self.encodes = 0
+        self.frames_skipped = 0
+
+    def _encode(self, frame, quality):
+        """Encode a frame for a variant"""
+        with STAGE_SECONDS.time("jpeg_encode"):
+            ret, jpeg = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+        self.encodes += 1
+        return jpeg.tobytes() if ret else None
+
+    def get_jpeg(self, quality=90, scale=1.0):
+        """
+        Get the current frame as JPEG bytes, encoding it only if not cached
+
+        Args:
+            quality (int): JPEG quality (0-100)
+            scale (float): Downscale factor applied before encoding
+
+        Returns:
+            tuple: (frame sequence number, JPEG bytes)
+        """
+        key = (int(quality), float(scale))
+
+        # Full-size streams reuse the camera's own MJPEG bytes when available
+        if key[1] == 1.0 and self.camera.passthrough_active:
+            seq, jpeg = self.camera.read_jpeg()
+            if jpeg is not None:
+                return seq, jpeg
+
+        with self.lock:
+            # Cheap check before touching the frame itself
+            seq = self.camera.frame_seq
+            cached = self.cache.get(key)
+            if cached is not None and cached[0] == seq:
+                return cached
+
+            # Scaled variants share the camera's per-frame resize cache
+            width, height = self.camera.frame_size
+            size = (max(1, int(width * key[1])), max(1, int(height * key[1])))
+            seq, frame = self.camera.get_scaled(size)
+            if frame is None:
+                # Blank frame until the camera delivers one
+                frame = np.zeros((size[1], size[0], 3), dtype=np.uint8)
+
+            entry = (seq, self._encode(frame, key[0]))
+
+            # Variants of older frames will never be served again
+            self.cache = {k: v for k, v in self.cache.items() if v[0] >= seq}
+            self.cache[key] = entry
+            return entry
+
+    async def get_jpeg_async(self, quality=90, scale=1.0):
+        """
+        Variant of get_jpeg() for the event loop
+
+        Cached variants and passthrough bytes are returned directly; a miss
+        is encoded in the default executor, since decoding, resizing and
+        encoding release the GIL and would otherwise stall every other
+        request. Concurrent misses still share one encode through the lock.
+
+        Args:
+            quality (int): JPEG quality (0-100)
+            scale (float): Downscale factor applied before encoding
+
+        Returns:
+            tuple: (frame sequence number, JPEG bytes)
+        """
+        key = (int(quality), float(scale))
+        if key[1] == 1.0 and self.camera.passthrough_active:
+            seq, jpeg = self.camera.read_jpeg()
+            if jpeg is not None:
+                return seq, jpeg
+
+        # A single dict lookup needs no lock; a stale miss only costs an executor hop
+        cached = self.cache.get(key)
+        if cached is not None and cached[0] == self.camera.frame_seq:
+            return cached
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.get_jpeg, quality, scale)
+
+    def get_info(self):
+        """
+        Get broadcaster statistics
+
+        Returns:
+            dict: Dictionary with client and encode counters
+        """
+        return {
+            "clients": self.clients,
+            "encodes": self.encodes,
+            "frames_skipped": self.frames_skipped,
+            "variants": len(self.cache),
+        }
+
+
+class StreamClient:
+    """
+    Per-client MJPEG stream settings with backpressure
+
+    A client is only handed the newest frame once its previous frame has
+    been written, so intermediate frames are dropped instead of queued for
+    slow consumers. In auto mode the JPEG quality, and below a floor the
+    scale, step down while writes take longer than the frame interval and
+    recover once the client keeps up again. Quality and scale are quantized
+    so clients with similar settings share the broadcaster's encodes.
+    """
+    QUALITY_STEP = 10
+    MIN_QUALITY = 30
+    MIN_SCALE = 0.25
+
+    def __init__(self, fps=10.0, scale=1.0, quality=90, auto=False):
+        """
+        Initialize the client settings
+
+        Args:
+            fps (float): Maximum frames per second for this client
+            scale (float): Requested downscale factor (0.1-1.0)
+            quality (int): Requested JPEG quality (10-100)
+            auto (bool): Lower quality and scale automatically for slow clients
+        """
+        self.fps = min(max(float(fps), 0.1), 30.0)
+        self.max_scale = self._quantize_scale(scale)
+        self.max_quality = self._quantize_quality(quality)
+        self.scale = self.max_scale
+        self.quality = self.max_quality
+        self.auto = auto
+        self.last_seq = None
+        self.write_time = 0.0
+
+    @staticmethod
+    def _quantize_scale(scale):
+        """Round a scale to 0.05 steps within 0.1-1.0"""
+        return round(min(max(float(scale), 0.1), 1.0) * 20) / 20
+
+    @staticmethod
+    def _quantize_quality(quality):
+        """Round a quality to steps of 5 within 10-100"""
+        return int(min(max(int(quality), 10), 100) // 5 * 5)
+
+    def interval(self, max_fps=None):
+        """
+        Seconds to wait between frames
+
+        Args:
+            max_fps (float): Server-wide cap, such as the governor's stream rate
+
+        Returns:
+            float: Frame interval
+        """
+        fps = self.fps if max_fps is None else min(self.fps, max_fps)
+        return 1.0 / max(fps, 0.1)
+
+    def skipped(self, seq):
+        """
+        Number of frames dropped since the last one sent
+
+        Args:
+            seq (int): Sequence number of the frame about to be sent
+
+        Returns:
+            int: Frames the client never received
+        """
+        if self.last_seq is None:
+            return 0
+        return max(seq - self.last_seq - 1, 0)
+
+    def record_write(self, started, interval, now=None):
+        """
+        Account for the time a frame took to reach the client
+
+        Args:
+            started (float): time.time() before the frame was yielded
+            interval (float): Target frame interval
+            now (float): Current time, defaults to time.time()
+        """
+        if now is None:
+            now = time.time()
+        self.write_time += 0.3 * ((now - started) - self.write_time)
+        if not self.auto:
+            return
+
+        if self.write_time > interval:
+            # Falling behind: cheaper frames first, smaller ones last
+            if self.quality - self.QUALITY_STEP >= self.MIN_QUALITY:
+                self.quality -= self.QUALITY_STEP
+            elif self.scale > self.MIN_SCALE:
+                self.scale = max(self._quantize_scale(self.scale * 0.75), self.MIN_SCALE)
+        elif self.write_time < 0.5 * interval:
+            # Keeping up comfortably: restore size, then quality
+            if self.scale < self.max_scale:
+                self.scale = min(self._quantize_scale(self.scale / 0.75), self.max_scale)
+            elif self.quality < self.max_quality:
+                self.quality = min(self.quality + self.QUALITY_STEP, self.max_quality)
@@ -1,22 +1,38 @@
 """
 Camera utility for Raspberry Pi 4B Person Detection System
 """
+import asyncio
+import os
+import random
 import cv2
 import threading
 import time
 import numpy as np
+from app.utils.metrics import STAGE_SECONDS
+
+
+def _resolve_future(future):
+    """Complete an asyncio waiter unless it already timed out"""
+    if not future.done():
+        future.set_result(True)
+
 
 class Camera:
     """
     Camera class to handle webcam operations with resource management
     """
-    def __init__(self, camera_id=0, resolution=(640, 480)):
+    def __init__(self, camera_id=0, resolution=(640, 480), buffer_size=4,
+                 mjpeg_passthrough=False, decode_scale=1):
         """
         Initialize camera
         
         Args:
             camera_id (int): Camera ID (default: 0 for built-in webcam)
             resolution (tuple): Desired resolution (width, height)
+            buffer_size (int): Number of frames kept in the ring buffer
+            mjpeg_passthrough (bool): Keep a USB webcam's native MJPEG bytes
+                for streaming and only decode frames that are read
+            decode_scale (int): Passthrough decode reduction (1, 2, 4 or 8)
         """
         self.camera_id = camera_id
         self.resolution = resolution
@@ -24,14 +40,70 @@ class Camera:
         self.frame = None
         self.stopped = True
         self.lock = threading.Lock()
+        self.new_frame = threading.Condition(self.lock)
         self.thread = None
+        self.generation = 0
         self.fps = 0
         self.source_type = "webcam"  # Default to webcam
         self.last_frame_time = 0
+        self.frame_seq = 0
+        
+        # Preallocated ring buffer of frames with sequence numbers and timestamps
+        self.buffer_size = max(int(buffer_size), 2)
+        self.ring = None
+        self.ring_seq = np.zeros(self.buffer_size, dtype=np.int64)
+        self.ring_time = np.zeros(self.buffer_size, dtype=np.float64)
+        self.latest_index = -1
+        self._async_waiters = []
+        self.frame_listeners = []
+        
+        # IP camera capture: buffer draining and reconnect backoff
+        self.max_drain = 30
+        self.drain_threshold = 0.005
+        self.reconnect_delay = 0.5
+        self.max_reconnect_delay = 30.0
+        self.frames_dropped = 0
+        self.reconnects = 0
+        self.capture_latency_ms = 0.0
+        
+        # MJPEG passthrough: compressed bytes per ring slot, decoded on demand
+        self.mjpeg_passthrough = mjpeg_passthrough
+        self.decode_scale = decode_scale if decode_scale in (1, 2, 4, 8) else 1
+        self.passthrough_active = False
+        self.ring_jpeg = [None] * self.buffer_size
+        self.ring_decoded = np.zeros(self.buffer_size, dtype=bool)
+        
+        # Downscaled copies of the latest frame: (width, height) -> (seq, frame)
+        self.derived = {}
+        self.resizes = 0
+    
+    def add_frame_listener(self, callback):
+        """
+        Call back whenever a new frame is published
+        
+        Args:
+            callback (callable): Called without arguments in the capture thread,
+                after the camera lock is released
+        """
+        self.frame_listeners.append(callback)
+    
+    def remove_frame_listener(self, callback):
+        """
+        Stop calling back on new frames
+        
+        Args:
+            callback (callable): Callback passed to add_frame_listener()
+        """
+        if callback in self.frame_listeners:
+            self.frame_listeners.remove(callback)
     
     def release(self):
         """Release camera resources"""
         self.stopped = True
+        
+        # Wake stream waiters so streams of a removed camera can end
+        with self.lock:
+            self._notify_async_waiters()
         if self.thread:
             self.thread.join(timeout=1.0)
         if self.cap:
@@ -94,35 +166,396 @@ class Camera:
         Returns:
             numpy.ndarray: Current frame
         """
+        return self.read_latest(copy=True)[1]
+    
+    def read_latest(self, copy=True, decode=True):
+        """
+        Read current frame together with its sequence number
+        
+        Args:
+            copy (bool): Return a private copy instead of a read-only view.
+                Views point into the ring buffer and stay valid for
+                buffer_size - 1 further frames; copy anything kept longer.
+            decode (bool): Decode a passthrough frame; with False the view's
+                pixels are only valid after decode_frame(seq)
+        
+        Returns:
+            tuple: (sequence number, numpy.ndarray frame or None)
+        """
+        entry = self._latest_entry(decode)
+        if entry is None:
+            return self.frame_seq, None
+        seq, _, frame = entry
+        return seq, frame.copy() if copy else frame
+    
+    def decode_frame(self, seq):
+        """
+        Decode a passthrough frame still held in the ring buffer
+        
+        Args:
+            seq (int): Frame sequence number
+        
+        Returns:
+            bool: False if the frame was already overwritten
+        """
         with self.lock:
-            return self.frame.copy() if self.frame is not None else None
+            matches = np.nonzero(self.ring_seq == seq)[0]
+            if seq <= 0 or len(matches) == 0:
+                return False
+            index = int(matches[0])
+        self._ensure_decoded(index)
+        return True
+    
+    def frame_time(self, seq):
+        """
+        Capture time of a frame still held in the ring buffer
+        
+        Args:
+            seq (int): Frame sequence number
+        
+        Returns:
+            float: time.time() at capture, or None if the frame was overwritten
+        """
+        with self.lock:
+            matches = np.nonzero(self.ring_seq == seq)[0]
+            if seq <= 0 or len(matches) == 0:
+                return None
+            return float(self.ring_time[matches[0]])
+    
+    @property
+    def frame_size(self):
+        """(width, height) of the frames held in the ring buffer"""
+        if self.ring is None:
+            return tuple(self.resolution)
+        return self.ring.shape[2], self.ring.shape[1]
+    
+    def get_scaled(self, size, seq=None):
+        """
+        Get a frame resized to size, resizing at most once per frame and size
+        
+        The detector input, the motion thumbnail and scaled stream variants
+        all come from here, so each derived size is computed lazily by the
+        first consumer that needs it and shared with every later one.
+        
+        Args:
+            size (tuple): Target (width, height)
+            seq (int): Sequence number of the frame to resize, defaults to
+                the latest frame
+        
+        Returns:
+            tuple: (sequence number, read-only numpy.ndarray, or None when the
+                frame is no longer in the ring buffer)
+        """
+        size = (int(size[0]), int(size[1]))
+        with self.lock:
+            if self.frame is None:
+                return self.frame_seq, None
+            if seq is None:
+                seq = self.frame_seq
+            
+            cached = self.derived.get(size)
+            if cached is not None and cached[0] == seq:
+                return cached
             
-    def _update(self):
-        """Internal thread function to continuously update frames"""
-        while not self.stopped:
+            matches = np.nonzero(self.ring_seq == seq)[0]
+            if self.latest_index < 0 or len(matches) == 0:
+                return seq, None
+            index = int(matches[0])
+            source = self.ring[index]
+        self._ensure_decoded(index)
+        
+        if source.shape[1::-1] == size:
+            return seq, source
+        
+        # Resize outside the lock; the slot stays valid for buffer_size - 1 frames
+        scaled = cv2.resize(source, size, interpolation=cv2.INTER_AREA)
+        scaled.flags.writeable = False
+        
+        with self.lock:
+            self.resizes += 1
+            cached = self.derived.get(size)
+            if cached is None or cached[0] < seq:
+                self.derived[size] = (seq, scaled)
+        return seq, scaled
+    
+    def read_jpeg(self):
+        """
+        Read the camera's own JPEG bytes for the current frame
+        
+        Returns:
+            tuple: (sequence number, bytes or None when passthrough is inactive)
+        """
+        with self.lock:
+            if not self.passthrough_active or self.latest_index < 0:
+                return self.frame_seq, None
+            i = self.latest_index
+            return int(self.ring_seq[i]), self.ring_jpeg[i]
+    
+    def _ensure_decoded(self, index):
+        """
+        Decode a passthrough slot's JPEG into its frame; caller must not hold the lock
+        
+        Decoding runs outside the lock so capture and other readers are not
+        held up. The result is stored only if the slot still holds the frame
+        whose bytes were decoded.
+        """
+        with self.lock:
+            if not self.passthrough_active or self.ring_decoded[index] or self.ring_jpeg[index] is None:
+                return
+            # Capture replaces the bytes object rather than mutating it
+            jpeg = self.ring_jpeg[index]
+            seq = self.ring_seq[index]
+            slot = self.ring[index]
+        
+        flags = {
+            1: cv2.IMREAD_COLOR,
+            2: cv2.IMREAD_REDUCED_COLOR_2,
+            4: cv2.IMREAD_REDUCED_COLOR_4,
+            8: cv2.IMREAD_REDUCED_COLOR_8,
+        }[self.decode_scale]
+        decoded = cv2.imdecode(np.frombuffer(jpeg, dtype=np.uint8), flags)
+        if decoded is None:
+            return
+        if decoded.shape[:2] != slot.shape[:2]:
+            decoded = cv2.resize(decoded, (slot.shape[1], slot.shape[0]))
+        
+        with self.lock:
+            if self.ring_seq[index] != seq or self.ring_decoded[index]:
+                return  # Slot was reused or decoded by another reader
+            np.copyto(slot, decoded)
+            self.ring_decoded[index] = True
+    
+    def _latest_entry(self, decode=True):
+        """
+        Latest (seq, timestamp, read-only view), or None before the first frame
+        
+        Takes the lock itself. The entry is that of the slot that was latest
+        when called, so a frame captured while it decodes is left for the
+        next read.
+        """
+        with self.lock:
+            index = self.latest_index
+            if index < 0 or self.frame is None:
+                return None
+            seq, timestamp, slot = int(self.ring_seq[index]), float(self.ring_time[index]), self.ring[index]
+        if decode:
+            self._ensure_decoded(index)
+        view = slot.view()
+        view.flags.writeable = False
+        return seq, timestamp, view
+    
+    def wait_for_frame(self, after_seq, timeout=None):
+        """
+        Block until a frame newer than after_seq is available
+        
+        Args:
+            after_seq (int): Last sequence number the caller has seen
+            timeout (float): Maximum seconds to wait, or None to wait forever
+            
+        Returns:
+            tuple: (seq, timestamp, read-only frame view), or None on timeout
+        """
+        with self.new_frame:
+            if not self.new_frame.wait_for(lambda: self.frame_seq > after_seq, timeout):
+                return None
+        return self._latest_entry()
+    
+    async def wait_for_frame_async(self, after_seq, timeout=None, decode=True):
+        """
+        Asyncio variant of wait_for_frame() that does not block the event loop
+        
+        Args:
+            after_seq (int): Last sequence number the caller has seen
+            timeout (float): Maximum seconds to wait, or None to wait forever
+            decode (bool): Decode passthrough frames; streams that only need
+                the JPEG bytes pass False
+            
+        Returns:
+            tuple: (seq, timestamp, read-only frame view), or None on timeout
+        """
+        loop = asyncio.get_running_loop()
+        with self.lock:
+            ready = self.frame_seq > after_seq
+            if not ready:
+                future = loop.create_future()
+                self._async_waiters.append((loop, future))
+        
+        if not ready:
+            try:
+                await asyncio.wait_for(future, timeout)
+            except asyncio.TimeoutError:
+                return None
+            finally:
+                # Only a new frame clears the list; drop a waiter that gave up
+                with self.lock:
+                    if (loop, future) in self._async_waiters:
+                        self._async_waiters.remove((loop, future))
+        return self._latest_entry(decode)
+    
+    def _notify_async_waiters(self):
+        """Wake asyncio waiters; caller holds the lock"""
+        for loop, future in self._async_waiters:
+            try:
+                loop.call_soon_threadsafe(_resolve_future, future)
+            except RuntimeError:
+                pass  # Event loop already closed
+        self._async_waiters = []
+            
+    def _running(self, generation):
+        """Whether the capture thread started as generation should keep going"""
+        return not self.stopped and generation == self.generation
+    
+    def _update(self, generation):
+        """
+        Internal thread function to continuously update frames
+        
+        Args:
+            generation (int): Value of self.generation when the thread was
+                started; a restart bumps it so a thread that outlived
+                release()'s join exits instead of running beside its successor
+        """
+        while self._running(generation):
             if self.cap is None or not self.cap.isOpened():
-                time.sleep(0.5)
+                if self.source_type == "ip_camera":
+                    self._reconnect(generation)
+                else:
+                    time.sleep(0.5)
                 continue
                 
-            ret, frame = self.cap.read()
+            # Capture straight into the next ring slot when sizes match
+            index = (self.latest_index + 1) % self.buffer_size
+            slot = self.ring[index]
+            capture_start = time.time()
+            if self.source_type == "ip_camera":
+                ret, frame = self._read_latest_ip(slot)
+            elif self.passthrough_active:
+                ret, frame = self.cap.read()
+            else:
+                ret, frame = self.cap.read(slot)
             
             if not ret:
-                time.sleep(0.5)
+                if self.source_type == "ip_camera":
+                    self._reconnect(generation)
+                else:
+                    time.sleep(0.5)
                 continue
+            
+            # Back off afresh only once a reopened stream delivers frames;
+            # one that opens and then fails at once keeps growing the delay
+            self.reconnect_delay = 0.5
                 
-            # Resize frame to desired resolution
-            if frame.shape[1::-1] != self.resolution:
-                frame = cv2.resize(frame, self.resolution)
+            # Drivers that ignore the raw request deliver decoded frames
+            if self.passthrough_active and (frame.ndim != 2 or frame.shape[0] != 1):
+                print("Camera does not provide raw MJPEG, disabling passthrough")
+                self.passthrough_active = False
+                self.cap.set(cv2.CAP_PROP_CONVERT_RGB, 1)
+            
+            if self.passthrough_active:
+                # Keep the compressed bytes; decoding waits for a reader
+                jpeg = frame.tobytes()
+            else:
+                # Resize frame to desired resolution
+                if frame.shape[:2] != slot.shape[:2]:
+                    cv2.resize(frame, (slot.shape[1], slot.shape[0]), dst=slot)
+                elif frame.ctypes.data != slot.ctypes.data:
+                    np.copyto(slot, frame)
                 
-            # Calculate FPS
+            # Calculate FPS and capture latency
             current_time = time.time()
+            STAGE_SECONDS.observe(current_time - capture_start, "capture")
+            self.capture_latency_ms += 0.2 * ((current_time - capture_start) * 1000 - self.capture_latency_ms)
             if self.last_frame_time > 0:
                 self.fps = 1 / (current_time - self.last_frame_time)
             self.last_frame_time = current_time
             
-            # Update frame with thread lock
+            # Publish the slot and wake waiting consumers
+            view = slot.view()
+            view.flags.writeable = False
             with self.lock:
-                self.frame = frame
+                if self.passthrough_active:
+                    self.ring_jpeg[index] = jpeg
+                    self.ring_decoded[index] = False
+                self.frame_seq += 1
+                self.ring_seq[index] = self.frame_seq
+                self.ring_time[index] = current_time
+                self.latest_index = index
+                self.frame = view
+                self.new_frame.notify_all()
+                self._notify_async_waiters()
+            for callback in self.frame_listeners:
+                callback()
+    
+    def _open_ip_capture(self):
+        """
+        Open an IP camera stream configured for low latency
+        
+        Returns:
+            cv2.VideoCapture: Capture object
+        """
+        # Ask FFmpeg not to buffer RTSP input; user settings take precedence
+        os.environ.setdefault(
+            "OPENCV_FFMPEG_CAPTURE_OPTIONS",
+            "rtsp_transport;tcp|fflags;nobuffer|flags;low_delay"
+        )
+        cap = cv2.VideoCapture(self.camera_id)
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        return cap
+    
+    def _read_latest_ip(self, slot):
+        """
+        Read the newest frame of an IP stream, dropping queued stale frames
+        
+        grab() only demuxes, so it is cheap to call repeatedly. A grab that
+        returns almost immediately came from a buffer; keep grabbing until
+        one has to wait for the network, then decode only that frame.
+        
+        Args:
+            slot (numpy.ndarray): Ring buffer slot to decode into
+            
+        Returns:
+            tuple: (success, frame)
+        """
+        drained = 0
+        while True:
+            grab_start = time.time()
+            if not self.cap.grab():
+                return False, None
+            if time.time() - grab_start > self.drain_threshold or drained >= self.max_drain:
+                break
+            drained += 1
+        
+        # Every buffered frame grabbed before the final one is skipped
+        self.frames_dropped += drained
+        return self.cap.retrieve(slot)
+    
+    def _reconnect(self, generation):
+        """Reopen a dropped IP stream with exponential backoff and jitter"""
+        if not self._running(generation):
+            return  # The capture belongs to a newer thread now
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
+        
+        delay = min(self.reconnect_delay, self.max_reconnect_delay)
+        delay += random.uniform(0, delay * 0.5)
+        print(f"Camera {self.camera_id} disconnected, reconnecting in {delay:.1f}s")
+        
+        # Sleep in small steps so release() is not held up
+        deadline = time.time() + delay
+        while self._running(generation) and time.time() < deadline:
+            time.sleep(min(0.1, deadline - time.time()))
+        if not self._running(generation):
+            return
+        
+        self.reconnects += 1
+        cap = self._open_ip_capture()
+        self.reconnect_delay = min(self.reconnect_delay * 2, self.max_reconnect_delay)
+        
+        # Opening can block for seconds; release() may have given up on us
+        if cap.isOpened() and self._running(generation):
+            self.cap = cap
+        else:
+            cap.release()
     
     def start(self):
         """Start camera capture"""
@@ -131,6 +564,21 @@ class Camera:
             
         self.stopped = False
         
+        # Allocate the ring buffer for the current resolution (reduced when
+        # passthrough frames are decoded at a smaller scale)
+        width, height = self.resolution
+        passthrough = self.mjpeg_passthrough and self.source_type == "webcam"
+        if passthrough:
+            width, height = width // self.decode_scale, height // self.decode_scale
+        with self.lock:
+            self.ring = np.zeros((self.buffer_size, height, width, 3), dtype=np.uint8)
+            self.ring_jpeg = [None] * self.buffer_size
+            self.ring_decoded[:] = False
+            self.derived = {}
+            self.latest_index = -1
+            self.frame = None
+            self.passthrough_active = False
+        
         # Initialize appropriate camera type
         if self.source_type == "picamera":
             try:
@@ -156,20 +604,30 @@ class Camera:
         
         if self.source_type == "ip_camera":
             # For IP cameras (RTSP, HTTP streams)
-            self.cap = cv2.VideoCapture(self.camera_id)
+            self.cap = self._open_ip_capture()
         else:
             # Regular webcam
             self.cap = cv2.VideoCapture(self.camera_id)
             self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.resolution[0])
             self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.resolution[1])
             
-        # Check if camera opened successfully
+            if passthrough and self.source_type == "webcam":
+                # Request MJPEG and receive the compressed bytes undecoded
+                self.cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*'MJPG'))
+                self.cap.set(cv2.CAP_PROP_CONVERT_RGB, 0)
+                self.passthrough_active = True
+            
+        # Check if camera opened successfully; an IP stream that is not up
+        # yet is left to the capture thread's reconnect loop
         if not self.cap.isOpened():
-            self.stopped = True
-            return False
+            if self.source_type != "ip_camera":
+                self.stopped = True
+                return False
+            print(f"Camera {self.camera_id} not reachable yet, retrying in the background")
             
         # Start thread for continuous frame capture
-        self.thread = threading.Thread(target=self._update)
+        self.generation += 1
+        self.thread = threading.Thread(target=self._update, args=(self.generation,))
         self.thread.daemon = True
         self.thread.start()
         return True
@@ -184,13 +642,19 @@ class Camera:
         Returns:
             bytes: JPEG encoded frame
         """
-        frame = self.read()
+        if self.passthrough_active:
+            _, jpeg = self.read_jpeg()
+            if jpeg is not None:
+                return jpeg
+        
+        _, frame = self.read_latest(copy=False)
         if frame is None:
             # Return a blank frame if no frame is available
             blank = np.zeros((self.resolution[1], self.resolution[0], 3), dtype=np.uint8)
             ret, jpeg = cv2.imencode('.jpg', blank)
         else:
-            ret, jpeg = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+            with STAGE_SECONDS.time("jpeg_encode"):
+                ret, jpeg = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
             
         return jpeg.tobytes() if ret else None
     
@@ -206,7 +670,13 @@ class Camera:
             "source": self.camera_id,
             "source_type": self.source_type,
             "fps": round(self.fps, 1),
-            "running": not self.stopped
+            "running": not self.stopped,
+            "frame_seq": self.frame_seq,
+            "capture_latency_ms": round(self.capture_latency_ms, 1),
+            "frames_dropped": self.frames_dropped,
+            "reconnects": self.reconnects,
+            "mjpeg_passthrough": self.passthrough_active,
+            "resizes": self.resizes
         }
 
     def __del__(self):
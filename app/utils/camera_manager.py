@@ -0,0 +1,131 @@
+"""
+Multi-camera manager for Person Detection System
+"""
+import threading
+from app.utils.broadcaster import FrameBroadcaster
+from app.utils.camera import Camera
+
+
+class CameraManager:
+    """
+    Owns several camera sources, each with its own capture thread
+
+    Sources may be webcams, the Raspberry Pi camera or RTSP/HTTP IP cameras.
+    Every camera also gets its own FrameBroadcaster for MJPEG streaming.
+    """
+    def __init__(self):
+        """Initialize an empty manager"""
+        self.lock = threading.Lock()
+        self.cameras = {}
+        self.broadcasters = {}
+
+    def add_camera(self, camera_id, source=0, resolution=(640, 480), camera=None,
+                   mjpeg_passthrough=False):
+        """
+        Register a camera
+
+        Args:
+            camera_id (str): Unique camera identifier
+            source: Camera source (webcam index, 'picamera' or stream URL)
+            resolution (tuple): Desired resolution (width, height)
+            camera (Camera): Existing camera to register instead of creating one
+            mjpeg_passthrough (bool): Stream a USB webcam's native MJPEG bytes
+
+        Returns:
+            Camera: The registered camera
+        """
+        camera_id = str(camera_id)
+        if camera is None:
+            camera = Camera(resolution=resolution, mjpeg_passthrough=mjpeg_passthrough)
+            camera.set_source(source)
+
+        with self.lock:
+            if camera_id in self.cameras:
+                raise ValueError(f"Camera already registered: {camera_id}")
+            self.cameras[camera_id] = camera
+            self.broadcasters[camera_id] = FrameBroadcaster(camera)
+        return camera
+
+    def remove_camera(self, camera_id):
+        """
+        Stop and unregister a camera
+
+        Args:
+            camera_id (str): Camera identifier
+
+        Returns:
+            bool: True if the camera existed
+        """
+        with self.lock:
+            camera = self.cameras.pop(str(camera_id), None)
+            self.broadcasters.pop(str(camera_id), None)
+        if camera is None:
+            return False
+        camera.release()
+        return True
+
+    def get(self, camera_id):
+        """
+        Get a camera by identifier
+
+        Args:
+            camera_id (str): Camera identifier
+
+        Returns:
+            Camera: Camera, or None if unknown
+        """
+        with self.lock:
+            return self.cameras.get(str(camera_id))
+
+    def get_broadcaster(self, camera_id):
+        """
+        Get the frame broadcaster of a camera
+
+        Args:
+            camera_id (str): Camera identifier
+
+        Returns:
+            FrameBroadcaster: Broadcaster, or None if unknown
+        """
+        with self.lock:
+            return self.broadcasters.get(str(camera_id))
+
+    def items(self):
+        """
+        Snapshot of registered cameras
+
+        Returns:
+            list: (camera_id, Camera) pairs
+        """
+        with self.lock:
+            return list(self.cameras.items())
+
+    def start_all(self):
+        """
+        Start every registered camera
+
+        Returns:
+            dict: Camera identifier to start success
+        """
+        return {camera_id: bool(camera.start()) or not camera.stopped
+                for camera_id, camera in self.items()}
+
+    def release_all(self):
+        """Release every registered camera"""
+        for _, camera in self.items():
+            camera.release()
+
+    def get_info(self):
+        """
+        Get information on all cameras
+
+        Returns:
+            dict: Camera identifier to camera and stream information
+        """
+        info = {}
+        for camera_id, camera in self.items():
+            info[camera_id] = camera.get_info()
+            broadcaster = self.get_broadcaster(camera_id)
+            if broadcaster is not None:
+                info[camera_id]["stream"] = broadcaster.get_info()
+        return info
@@ -2,20 +2,60 @@
 Database utility for Person Detection System
 """
 import os
+import asyncio
 import aiosqlite
 import time
+from contextlib import asynccontextmanager
+from urllib.parse import quote
+from app.utils.metrics import STAGE_SECONDS
+
+
+# Pragmas shared by the writer and reader connections: page cache in KiB
+# (negative), memory-mapped reads and in-memory temp tables for sorts
+CONNECTION_PRAGMAS = (
+    "PRAGMA cache_size = -8192;",
+    "PRAGMA mmap_size = 67108864;",
+    "PRAGMA temp_store = MEMORY;",
+)
+
+# Prepared statements kept per connection; queries use constant SQL text so
+# repeated calls hit sqlite3's statement cache
+STATEMENT_CACHE_SIZE = 256
+
+# Confidence is stored as an integer number of thousandths
+CONFIDENCE_SCALE = 1000
 
 class Database:
     """
     SQLite database handler with WAL mode for performance
+    
+    Writes go through a single writer connection while reads are served by
+    a small pool of read-only connections, which WAL lets run concurrently
+    with the writer, so long analytics queries never delay detection inserts.
+    Every transaction on the writer connection holds write_lock, so batched
+    inserts, settings and retention chunks never interleave inside one
+    another's transaction.
+    
+    Besides raw detections, per-minute and per-hour rollups are maintained
+    as rows are written so history queries never scan raw data. A periodic
+    retention pass keeps raw rows and minute rollups for a limited number of
+    days, enforces the size cap and reclaims free pages incrementally.
     """
-    def __init__(self, db_path=None, max_size_mb=200):
+    # (bucket seconds, table) from finest to coarsest
+    ROLLUPS = ((60, "detections_minute"), (3600, "detections_hour"))
+    
+    def __init__(self, db_path=None, max_size_mb=200, raw_retention_days=7,
+                 minute_retention_days=30, readers=2):
         """
         Initialize database
         
         Args:
             db_path (str): Path to SQLite database file
             max_size_mb (int): Maximum database size in MB
+            raw_retention_days (float): Days raw detection rows are kept
+            minute_retention_days (float): Days per-minute rollups are kept;
+                per-hour rollups are kept until the size cap is reached
+            readers (int): Number of read-only connections in the pool
         """
         if db_path is None:
             db_path = os.path.join(
@@ -28,24 +68,115 @@ class Database:
             
         self.db_path = db_path
         self.max_size_mb = max_size_mb
+        self.raw_retention_days = raw_retention_days
+        self.minute_retention_days = minute_retention_days
+        self.retention_chunk_seconds = 600
+        self.vacuum_pages = 256
+        self.last_retention = None
+        self.readers = max(int(readers), 1)
+        self.read_pool = None
+        self.read_connections = []
         self.connection = None
+        self.write_lock = asyncio.Lock()
+        self.ready = False
+        self._opening = None
         
     async def initialize(self):
-        """Initialize database connection and tables"""
-        self.connection = await aiosqlite.connect(self.db_path)
+        """
+        Initialize database connections and tables
         
-        # Enable WAL mode for better performance
+        Startup and every method that opens the database lazily share one
+        initialization, so requests served while migrations run wait for
+        them instead of starting a second one. A failed attempt is cleared
+        so the next caller retries.
+        """
+        if self.ready:
+            return
+        if self._opening is None:
+            self._opening = asyncio.ensure_future(self._open())
+        opening = self._opening
+        try:
+            # Shielded so a cancelled request does not abort the migrations
+            await asyncio.shield(opening)
+        except Exception:
+            if self._opening is opening and opening.done():
+                self._opening = None
+            raise
+    
+    async def _open(self):
+        """Run _connect(), closing half-opened connections if it fails"""
+        try:
+            await self._connect()
+        except Exception:
+            await self.close()
+            raise
+        self.ready = True
+    
+    async def _connect(self):
+        """Open the writer connection, migrate the schema and open the read pool"""
+        self.connection = await aiosqlite.connect(
+            self.db_path, cached_statements=STATEMENT_CACHE_SIZE
+        )
+        
+        # Free pages are reclaimed incrementally; only takes effect on a new file
+        await self.connection.execute("PRAGMA auto_vacuum = INCREMENTAL;")
+        
+        # Enable WAL mode for better performance, truncating the WAL after
+        # checkpoints so it does not stay at its largest size
         await self.connection.execute("PRAGMA journal_mode=WAL;")
+        await self.connection.execute("PRAGMA journal_size_limit = 4194304;")
+        
+        # WAL stays consistent with NORMAL; only a power cut can lose the
+        # last commits, and the writer no longer fsyncs on every transaction
+        await self.connection.execute("PRAGMA synchronous = NORMAL;")
+        for pragma in CONNECTION_PRAGMAS:
+            await self.connection.execute(pragma)
         
-        # Create tables
+        await self._migrate()
+        await self._open_readers()
+    
+    async def _migrate(self):
+        """
+        Bring the schema up to SCHEMA_VERSION
+        
+        The applied version is kept in PRAGMA user_version. Each pending
+        migration runs in its own transaction together with the version bump,
+        so an interrupted upgrade resumes from the last completed step.
+        """
+        current = await self._pragma_value("user_version")
+        for version, migration in enumerate(self.MIGRATIONS, start=1):
+            if version <= current:
+                continue
+            async with self.write_lock:
+                await self.connection.execute("BEGIN")
+                try:
+                    await migration(self)
+                    await self.connection.execute(f"PRAGMA user_version = {version}")
+                    await self.connection.commit()
+                except Exception:
+                    await self.connection.rollback()
+                    raise
+            print(f"Database migrated to schema version {version}")
+    
+    async def _migration_base_tables(self):
+        """Version 1: detections in seconds, settings and errors"""
         await self.connection.execute("""
         CREATE TABLE IF NOT EXISTS detections (
             timestamp INTEGER PRIMARY KEY,
             count INTEGER,
-            confidence REAL
+            confidence REAL,
+            camera_id TEXT NOT NULL DEFAULT '0'
         );
         """)
         
+        # Databases created before multi-camera support lack camera_id
+        async with self.connection.execute("PRAGMA table_info(detections)") as cursor:
+            columns = [row[1] for row in await cursor.fetchall()]
+        if "camera_id" not in columns:
+            await self.connection.execute(
+                "ALTER TABLE detections ADD COLUMN camera_id TEXT NOT NULL DEFAULT '0'"
+            )
+        
         await self.connection.execute("""
         CREATE TABLE IF NOT EXISTS settings (
             key TEXT PRIMARY KEY,
@@ -60,64 +191,278 @@ class Database:
             resolved INTEGER DEFAULT 0
         );
         """)
+    
+    async def _migration_millisecond_detections(self):
+        """
+        Version 3: detections keyed by (camera_id, timestamp_ms)
         
-        await self.connection.commit()
+        Like the rollup tables, the table is clustered on its primary key, so
+        per-camera range queries read one contiguous b-tree range, and a
+        timestamp index serves all-camera queries and retention. Confidence
+        is stored as an integer in thousandths.
+        """
+        await self.connection.execute("""
+        CREATE TABLE detections_ms (
+            camera_id TEXT NOT NULL,
+            timestamp_ms INTEGER NOT NULL,
+            count INTEGER NOT NULL,
+            confidence INTEGER NOT NULL,
+            PRIMARY KEY (camera_id, timestamp_ms)
+        ) WITHOUT ROWID;
+        """)
+        await self.connection.execute(f"""
+        INSERT INTO detections_ms (camera_id, timestamp_ms, count, confidence)
+        SELECT camera_id, timestamp * 1000, COALESCE(count, 0),
+               CAST(ROUND(COALESCE(confidence, 0) * {CONFIDENCE_SCALE}) AS INTEGER)
+        FROM detections
+        ORDER BY timestamp
+        """)
+        await self.connection.execute("DROP TABLE detections")
+        await self.connection.execute("ALTER TABLE detections_ms RENAME TO detections")
+        await self.connection.execute(
+            "CREATE INDEX idx_detections_time ON detections (timestamp_ms)"
+        )
     
-    async def store_detection(self, count, confidence):
+    async def _open_readers(self):
+        """Open the pool of read-only connections"""
+        uri = f"file:{quote(os.path.abspath(self.db_path))}?mode=ro"
+        self.read_pool = asyncio.Queue()
+        self.read_connections = []
+        for _ in range(self.readers):
+            reader = await aiosqlite.connect(
+                uri, uri=True, cached_statements=STATEMENT_CACHE_SIZE
+            )
+            await reader.execute("PRAGMA query_only = 1;")
+            for pragma in CONNECTION_PRAGMAS:
+                await reader.execute(pragma)
+            self.read_connections.append(reader)
+            self.read_pool.put_nowait(reader)
+    
+    @asynccontextmanager
+    async def _reader(self):
+        """Borrow a read-only connection from the pool"""
+        await self.initialize()
+        reader = await self.read_pool.get()
+        try:
+            yield reader
+        finally:
+            self.read_pool.put_nowait(reader)
+    
+    async def _migration_rollup_tables(self):
+        """Version 2: rollup tables, backfilled from existing detections"""
+        for seconds, table in self.ROLLUPS:
+            await self.connection.execute(f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                camera_id TEXT NOT NULL,
+                bucket INTEGER NOT NULL,
+                samples INTEGER NOT NULL,
+                sum_count INTEGER NOT NULL,
+                min_count INTEGER NOT NULL,
+                max_count INTEGER NOT NULL,
+                sum_confidence REAL NOT NULL,
+                PRIMARY KEY (camera_id, bucket)
+            ) WITHOUT ROWID;
+            """)
+            await self.connection.execute(
+                f"CREATE INDEX IF NOT EXISTS idx_{table}_bucket ON {table} (bucket)"
+            )
+            
+            async with self.connection.execute(f"SELECT 1 FROM {table} LIMIT 1") as cursor:
+                populated = await cursor.fetchone() is not None
+            if not populated:
+                await self.connection.execute(f"""
+                INSERT INTO {table}
+                SELECT camera_id, (timestamp / {seconds}) * {seconds}, COUNT(*),
+                       SUM(count), MIN(count), MAX(count), TOTAL(confidence)
+                FROM detections
+                GROUP BY camera_id, (timestamp / {seconds})
+                """)
+    
+    async def _update_rollups(self, rows):
+        """
+        Fold a batch of detections into every rollup table
+        
+        The batch is aggregated in memory first, so each touched bucket costs
+        one upsert. Caller commits.
+        
+        Args:
+            rows (list): (timestamp, count, confidence, camera_id) tuples
+        """
+        for seconds, table in self.ROLLUPS:
+            buckets = {}
+            for ts, count, confidence, camera_id in rows:
+                key = (str(camera_id), int(ts) // seconds * seconds)
+                bucket = buckets.get(key)
+                confidence = confidence or 0.0
+                if bucket is None:
+                    buckets[key] = [1, count, count, count, confidence]
+                else:
+                    bucket[0] += 1
+                    bucket[1] += count
+                    bucket[2] = min(bucket[2], count)
+                    bucket[3] = max(bucket[3], count)
+                    bucket[4] += confidence
+            
+            await self.connection.executemany(
+                f"""
+                INSERT INTO {table}
+                    (camera_id, bucket, samples, sum_count, min_count, max_count, sum_confidence)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (camera_id, bucket) DO UPDATE SET
+                    samples = samples + excluded.samples,
+                    sum_count = sum_count + excluded.sum_count,
+                    min_count = MIN(min_count, excluded.min_count),
+                    max_count = MAX(max_count, excluded.max_count),
+                    sum_confidence = sum_confidence + excluded.sum_confidence
+                """,
+                [key + tuple(values) for key, values in buckets.items()]
+            )
+    
+    async def store_detection(self, count, confidence, camera_id="0"):
         """
         Store detection data
         
         Args:
             count (int): Number of persons detected
             confidence (float): Confidence level
+            camera_id (str): Camera the detection came from
             
         Returns:
             bool: Success status
         """
-        if self.connection is None:
-            await self.initialize()
+        return await self.store_detections([(time.time(), count, confidence, camera_id)])
+    
+    async def store_detections(self, rows):
+        """
+        Store a batch of detections in a single transaction
+        
+        Args:
+            rows (list): (timestamp, count, confidence, camera_id) tuples
             
-        try:
-            # Check if database size exceeds limit
-            if await self._check_size() > self.max_size_mb:
-                # Remove oldest records
-                await self._cleanup_old_records()
-                
-            # Store detection
-            timestamp = int(time.time())
-            await self.connection.execute(
-                "INSERT INTO detections (timestamp, count, confidence) VALUES (?, ?, ?)",
-                (timestamp, count, confidence)
-            )
-            await self.connection.commit()
+        Returns:
+            bool: Success status
+        """
+        await self.initialize()
+        if not rows:
             return True
             
-        except Exception as e:
-            # Log error
-            await self.log_error(f"Failed to store detection: {e}")
-            return False
+        async with self.write_lock:
+            try:
+                return await self._insert_detections(rows)
+            except Exception as e:
+                # Discard the partial batch; log_error() commits, which would
+                # otherwise persist raw rows without their rollups
+                await self.connection.rollback()
+                error = e
+        await self.log_error(f"Failed to store detections: {error}")
+        return False
     
-    async def get_recent_detections(self, minutes=10):
+    async def _insert_detections(self, rows):
+        """Insert a batch and its rollups and commit; caller holds write_lock"""
+        # Store detections one statement each so ignored duplicates can be
+        # told apart by rowcount and kept out of the rollups; RETURNING would
+        # need SQLite 3.35, newer than Raspberry Pi OS Bullseye ships
+        started = time.perf_counter()
+        inserted = []
+        for ts, count, confidence, camera_id in rows:
+            values = (str(camera_id), int(ts * 1000), int(count),
+                      int(round((confidence or 0.0) * CONFIDENCE_SCALE)))
+            cursor = await self.connection.execute(
+                "INSERT OR IGNORE INTO detections (camera_id, timestamp_ms, count, confidence) VALUES (?, ?, ?, ?)",
+                values
+            )
+            if cursor.rowcount == 1:
+                inserted.append(values)
+            await cursor.close()
+        await self._update_rollups([
+            (ts_ms / 1000, count, confidence / CONFIDENCE_SCALE, camera_id)
+            for camera_id, ts_ms, count, confidence in inserted
+        ])
+        await self.connection.commit()
+        STAGE_SECONDS.observe(time.perf_counter() - started, "db_write")
+        return True
+    
+    async def get_recent_detections(self, minutes=10, camera_id=None):
         """
         Get detections from the last N minutes
         
         Args:
             minutes (int): Number of minutes to look back
+            camera_id (str): Restrict to one camera, answered by a range
+                scan of the primary key, or None for all cameras
             
         Returns:
-            list: List of detection records
+            list: List of (timestamp in seconds, count, confidence) records
         """
-        if self.connection is None:
-            await self.initialize()
+        past_ms = int((time.time() - minutes * 60) * 1000)
+        
+        if camera_id is None:
+            query = """
+                SELECT timestamp_ms / 1000.0, count, confidence / 1000.0 FROM detections
+                WHERE timestamp_ms >= ? ORDER BY timestamp_ms
+            """
+            params = (past_ms,)
+        else:
+            query = """
+                SELECT timestamp_ms / 1000.0, count, confidence / 1000.0 FROM detections
+                WHERE camera_id = ? AND timestamp_ms >= ? ORDER BY timestamp_ms
+            """
+            params = (str(camera_id), past_ms)
+        
+        async with self._reader() as reader:
+            async with reader.execute(query, params) as cursor:
+                return await cursor.fetchall()
+    
+    async def get_detection_history(self, days=7, camera_id=None, max_points=500):
+        """
+        Get detection aggregates for the last N days from the rollup tables
+        
+        Uses per-minute buckets when the range fits in max_points of them and
+        per-hour buckets otherwise.
+        
+        Args:
+            days (float): Number of days to look back
+            camera_id (str): Restrict to one camera, or None for all cameras
+            max_points (int): Most buckets wanted by the caller
             
-        now = int(time.time())
-        past = now - (minutes * 60)
+        Returns:
+            list: List of dicts with bucket timestamp, average/min/max count,
+                average confidence and sample count
+        """
+        span = days * 86400
+        seconds, table = next(
+            ((s, t) for s, t in self.ROLLUPS if span / s <= max_points),
+            self.ROLLUPS[-1]
+        )
         
-        async with self.connection.execute(
-            "SELECT timestamp, count, confidence FROM detections WHERE timestamp >= ? ORDER BY timestamp",
-            (past,)
-        ) as cursor:
-            return await cursor.fetchall()
+        past = int(time.time() - span) // seconds * seconds
+        query = f"""
+            SELECT bucket, SUM(samples), SUM(sum_count), MIN(min_count),
+                   MAX(max_count), SUM(sum_confidence)
+            FROM {table}
+            WHERE bucket >= ?
+        """
+        params = [past]
+        if camera_id is not None:
+            query += " AND camera_id = ?"
+            params.append(str(camera_id))
+        query += " GROUP BY bucket ORDER BY bucket"
+        
+        async with self._reader() as reader:
+            async with reader.execute(query, params) as cursor:
+                rows = await cursor.fetchall()
+            
+        return [
+            {
+                "timestamp": bucket,
+                "avg_count": round(sum_count / samples, 2),
+                "min_count": min_count,
+                "max_count": max_count,
+                "avg_confidence": round(sum_confidence / samples, 3),
+                "samples": samples,
+            }
+            for bucket, samples, sum_count, min_count, max_count, sum_confidence in rows
+        ]
     
     async def get_paginated_detections(self, page=1, page_size=50):
         """
@@ -130,24 +475,25 @@ class Database:
         Returns:
             tuple: (records, total_count)
         """
-        if self.connection is None:
-            await self.initialize()
-            
         # Calculate offset
         offset = (page - 1) * page_size
         
-        # Get total count
-        async with self.connection.execute(
-            "SELECT COUNT(*) FROM detections"
-        ) as cursor:
-            total_count = (await cursor.fetchone())[0]
-        
-        # Get data
-        async with self.connection.execute(
-            "SELECT timestamp, count, confidence FROM detections ORDER BY timestamp DESC LIMIT ? OFFSET ?",
-            (page_size, offset)
-        ) as cursor:
-            records = await cursor.fetchall()
+        async with self._reader() as reader:
+            # Get total count
+            async with reader.execute(
+                "SELECT COUNT(*) FROM detections"
+            ) as cursor:
+                total_count = (await cursor.fetchone())[0]
+            
+            # Get data
+            async with reader.execute(
+                """
+                SELECT timestamp_ms / 1000.0, count, confidence / 1000.0 FROM detections
+                ORDER BY timestamp_ms DESC LIMIT ? OFFSET ?
+                """,
+                (page_size, offset)
+            ) as cursor:
+                records = await cursor.fetchall()
             
         return records, total_count
     
@@ -162,14 +508,12 @@ class Database:
         Returns:
             str: Setting value
         """
-        if self.connection is None:
-            await self.initialize()
-            
-        async with self.connection.execute(
-            "SELECT value FROM settings WHERE key = ?",
-            (key,)
-        ) as cursor:
-            result = await cursor.fetchone()
+        async with self._reader() as reader:
+            async with reader.execute(
+                "SELECT value FROM settings WHERE key = ?",
+                (key,)
+            ) as cursor:
+                result = await cursor.fetchone()
             
         if result is None:
             return default
@@ -186,25 +530,22 @@ class Database:
         Returns:
             bool: Success status
         """
-        if self.connection is None:
-            await self.initialize()
-            
-        try:
-            await self.connection.execute(
-                "INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)",
-                (key, str(value))
-            )
-            await self.connection.commit()
-            
-            # Run VACUUM after settings changes to optimize storage
-            await self.connection.execute("PRAGMA auto_vacuum = INCREMENTAL;")
-            await self.connection.execute("PRAGMA incremental_vacuum;")
+        await self.initialize()
             
-            return True
-            
-        except Exception as e:
-            await self.log_error(f"Failed to set setting: {e}")
-            return False
+        async with self.write_lock:
+            try:
+                await self.connection.execute(
+                    "INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)",
+                    (key, str(value))
+                )
+                await self.connection.commit()
+                return True
+                
+            except Exception as e:
+                await self.connection.rollback()
+                error = e
+        await self.log_error(f"Failed to set setting: {error}")
+        return False
     
     async def log_error(self, message):
         """
@@ -216,32 +557,33 @@ class Database:
         Returns:
             bool: Success status
         """
-        if self.connection is None:
-            await self.initialize()
+        await self.initialize()
             
-        try:
-            timestamp = int(time.time())
-            await self.connection.execute(
-                "INSERT INTO errors (timestamp, message) VALUES (?, ?)",
-                (timestamp, message)
-            )
-            await self.connection.commit()
-            
-            # Limit error log entries to last 1,000 items
-            await self.connection.execute(
-                """
-                DELETE FROM errors 
-                WHERE timestamp NOT IN (
-                    SELECT timestamp FROM errors ORDER BY timestamp DESC LIMIT 1000
+        async with self.write_lock:
+            try:
+                timestamp = int(time.time())
+                await self.connection.execute(
+                    "INSERT INTO errors (timestamp, message) VALUES (?, ?)",
+                    (timestamp, message)
                 )
-                """
-            )
-            await self.connection.commit()
-            return True
-            
-        except Exception as e:
-            print(f"Critical error: Failed to log error: {e}")
-            return False
+                await self.connection.commit()
+                
+                # Limit error log entries to last 1,000 items
+                await self.connection.execute(
+                    """
+                    DELETE FROM errors 
+                    WHERE timestamp NOT IN (
+                        SELECT timestamp FROM errors ORDER BY timestamp DESC LIMIT 1000
+                    )
+                    """
+                )
+                await self.connection.commit()
+                return True
+                
+            except Exception as e:
+                await self.connection.rollback()
+                print(f"Critical error: Failed to log error: {e}")
+                return False
     
     async def get_errors(self, resolved=False, limit=100):
         """
@@ -254,14 +596,12 @@ class Database:
         Returns:
             list: List of error records
         """
-        if self.connection is None:
-            await self.initialize()
-            
-        async with self.connection.execute(
-            "SELECT timestamp, message FROM errors WHERE resolved = ? ORDER BY timestamp DESC LIMIT ?",
-            (1 if resolved else 0, limit)
-        ) as cursor:
-            return await cursor.fetchall()
+        async with self._reader() as reader:
+            async with reader.execute(
+                "SELECT timestamp, message FROM errors WHERE resolved = ? ORDER BY timestamp DESC LIMIT ?",
+                (1 if resolved else 0, limit)
+            ) as cursor:
+                return await cursor.fetchall()
     
     async def mark_error_resolved(self, timestamp):
         """
@@ -273,20 +613,21 @@ class Database:
         Returns:
             bool: Success status
         """
-        if self.connection is None:
-            await self.initialize()
+        await self.initialize()
             
-        try:
-            await self.connection.execute(
-                "UPDATE errors SET resolved = 1 WHERE timestamp = ?",
-                (timestamp,)
-            )
-            await self.connection.commit()
-            return True
-            
-        except Exception as e:
-            print(f"Failed to mark error as resolved: {e}")
-            return False
+        async with self.write_lock:
+            try:
+                await self.connection.execute(
+                    "UPDATE errors SET resolved = 1 WHERE timestamp = ?",
+                    (timestamp,)
+                )
+                await self.connection.commit()
+                return True
+                
+            except Exception as e:
+                await self.connection.rollback()
+                print(f"Failed to mark error as resolved: {e}")
+                return False
     
     async def clear_resolved_errors(self):
         """
@@ -295,65 +636,179 @@ class Database:
         Returns:
             int: Number of cleared errors
         """
-        if self.connection is None:
-            await self.initialize()
+        await self.initialize()
             
-        try:
-            async with self.connection.execute(
-                "DELETE FROM errors WHERE resolved = 1"
-            ) as cursor:
-                await self.connection.commit()
-                return cursor.rowcount
-                
-        except Exception as e:
-            await self.log_error(f"Failed to clear resolved errors: {e}")
-            return 0
+        async with self.write_lock:
+            try:
+                async with self.connection.execute(
+                    "DELETE FROM errors WHERE resolved = 1"
+                ) as cursor:
+                    await self.connection.commit()
+                    return cursor.rowcount
+                    
+            except Exception as e:
+                await self.connection.rollback()
+                error = e
+        await self.log_error(f"Failed to clear resolved errors: {error}")
+        return 0
+    
+    async def _pragma_value(self, name):
+        """Read a single-valued PRAGMA"""
+        async with self.connection.execute(f"PRAGMA {name}") as cursor:
+            return (await cursor.fetchone())[0]
     
     async def _check_size(self):
         """
-        Check database size in MB
+        Check the size of the data held in the database
+        
+        Counts used pages rather than the file size, which includes free
+        pages awaiting vacuum and ignores the WAL.
         
         Returns:
             float: Database size in MB
         """
-        try:
-            size = os.path.getsize(self.db_path)
-            return size / (1024 * 1024)  # Convert bytes to MB
-        except OSError:
-            return 0
+        page_size = await self._pragma_value("page_size")
+        page_count = await self._pragma_value("page_count")
+        freelist = await self._pragma_value("freelist_count")
+        return (page_count - freelist) * page_size / (1024 * 1024)
     
-    async def _cleanup_old_records(self):
+    async def _delete_range(self, table, column, start, end, step):
         """
-        Remove oldest records to keep database within size limit
+        Delete rows with start <= column < end in chunks of the time axis
+        
+        Each chunk is its own short transaction under write_lock, which is
+        released between chunks so queued detection writes interleave.
+        
+        Returns:
+            int: Number of rows deleted
         """
-        try:
-            # Delete oldest 10% of records
-            async with self.connection.execute(
-                "SELECT COUNT(*) FROM detections"
-            ) as cursor:
-                total = (await cursor.fetchone())[0]
-                
-            if total > 100:  # Only clean if we have enough records
-                delete_count = max(int(total * 0.1), 100)  # Delete at least 100 records
-                
-                await self.connection.execute(
-                    """
-                    DELETE FROM detections 
-                    WHERE timestamp IN (
-                        SELECT timestamp FROM detections
-                        ORDER BY timestamp ASC
-                        LIMIT ?
-                    )
-                    """,
-                    (delete_count,)
+        deleted = 0
+        chunk_start = start
+        while chunk_start < end:
+            chunk_end = min(chunk_start + step, end)
+            async with self.write_lock:
+                cursor = await self.connection.execute(
+                    f"DELETE FROM {table} WHERE {column} >= ? AND {column} < ?",
+                    (chunk_start, chunk_end)
                 )
+                deleted += cursor.rowcount
+                await cursor.close()
                 await self.connection.commit()
-                
-        except Exception as e:
-            print(f"Failed to cleanup old records: {e}")
+            chunk_start = chunk_end
+            await asyncio.sleep(0)
+        return deleted
+    
+    async def _oldest(self, table, column):
+        """Oldest value of a time column, or None for an empty table"""
+        async with self.connection.execute(f"SELECT MIN({column}) FROM {table}") as cursor:
+            return (await cursor.fetchone())[0]
+    
+    async def apply_retention(self, now=None):
+        """
+        Expire old data, enforce the size cap and reclaim free space
+        
+        Raw rows older than raw_retention_days are already summarized in the
+        rollup tables, so they are deleted outright by the timestamp index, as are minute rollups
+        older than minute_retention_days. If the data still exceeds
+        max_size_mb, the oldest day of raw rows, then of hour rollups, is
+        removed until it fits. Finally the WAL is checkpointed and free
+        pages are released a batch at a time.
+        
+        Args:
+            now (float): Current time, defaults to time.time()
+            
+        Returns:
+            dict: Rows deleted per table and the resulting size
+        """
+        await self.initialize()
+        if now is None:
+            now = time.time()
+            
+        deleted = {"detections": 0, "detections_minute": 0, "detections_hour": 0}
+        # Raw rows are many per second and keyed in milliseconds, rollups one
+        # per minute or hour in seconds, so rollups use much larger chunks.
+        # (table, column, column units per second, chunk seconds)
+        raw = ("detections", "timestamp_ms", 1000, self.retention_chunk_seconds)
+        minute = ("detections_minute", "bucket", 1, 86400)
+        hour = ("detections_hour", "bucket", 1, 86400)
+        
+        expiries = (
+            (raw, now - self.raw_retention_days * 86400),
+            (minute, now - self.minute_retention_days * 86400),
+        )
+        for (table, column, units, step), cutoff in expiries:
+            oldest = await self._oldest(table, column)
+            if oldest is not None and oldest < cutoff * units:
+                deleted[table] += await self._delete_range(
+                    table, column, oldest, int(cutoff * units), step * units
+                )
+        
+        # Size cap: shed the oldest remaining day until the data fits
+        for table, column, units, step in (raw, hour):
+            while await self._check_size() > self.max_size_mb:
+                oldest = await self._oldest(table, column)
+                if oldest is None:
+                    break
+                deleted[table] += await self._delete_range(
+                    table, column, oldest, oldest + 86400 * units, step * units
+                )
+        
+        # Move WAL contents into the database without blocking writers
+        async with self.write_lock:
+            await self.connection.execute("PRAGMA wal_checkpoint(PASSIVE);")
+        
+        # Release free pages in small batches; the pragma frees pages as it
+        # is stepped, so its (empty) result must be fetched
+        freelist = await self._pragma_value("freelist_count")
+        while freelist > 0:
+            async with self.write_lock:
+                async with self.connection.execute(
+                    f"PRAGMA incremental_vacuum({self.vacuum_pages});"
+                ) as cursor:
+                    await cursor.fetchall()
+                await self.connection.commit()
+            remaining = await self._pragma_value("freelist_count")
+            if remaining >= freelist:
+                break  # Not an incremental auto-vacuum database
+            freelist = remaining
+            await asyncio.sleep(0)
+        
+        self.last_retention = {
+            "timestamp": int(now),
+            "deleted": deleted,
+            "size_mb": round(await self._check_size(), 2),
+        }
+        return self.last_retention
+    
+    async def run_retention(self, interval=3600):
+        """
+        Apply retention periodically until cancelled
+        
+        Args:
+            interval (float): Seconds between retention passes
+        """
+        while True:
+            try:
+                await self.apply_retention()
+            except Exception as e:
+                print(f"Retention pass failed: {e}")
+            await asyncio.sleep(interval)
+    
+    # Applied in order; the position in this list is the schema version
+    MIGRATIONS = (
+        _migration_base_tables,
+        _migration_rollup_tables,
+        _migration_millisecond_detections,
+    )
     
     async def close(self):
-        """Close database connection"""
+        """Close database connections"""
+        self.ready = False
+        self._opening = None
+        for reader in self.read_connections:
+            await reader.close()
+        self.read_connections = []
+        self.read_pool = None
         if self.connection:
             await self.connection.close()
             self.connection = None
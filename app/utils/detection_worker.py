@@ -0,0 +1,205 @@
+"""
+Background detection worker for Person Detection System
+"""
+import threading
+import time
+import cv2
+from app.utils.metrics import FRAMES_INFERRED, FRAMES_SKIPPED
+
+
+class DetectionStore:
+    """
+    Thread-safe holder for the most recent detection result
+    """
+    def __init__(self):
+        """Initialize an empty store"""
+        self.lock = threading.Lock()
+        self.result = None
+        self.listeners = []
+
+    def add_listener(self, callback):
+        """
+        Call back on every published result
+
+        Args:
+            callback (callable): Receives the result dict in the worker thread
+        """
+        self.listeners.append(callback)
+
+    def publish(self, result):
+        """
+        Replace the latest detection result
+
+        Args:
+            result (dict): Detection result
+        """
+        with self.lock:
+            self.result = result
+        for callback in self.listeners:
+            callback(result)
+
+    def get(self):
+        """
+        Get the latest detection result
+
+        Returns:
+            dict: Copy of the latest result, or None if nothing was published
+        """
+        with self.lock:
+            return dict(self.result) if self.result is not None else None
+
+
+class DetectionWorker:
+    """
+    Per-camera inference channel driven by the InferenceScheduler
+
+    Holds the camera's store, motion gate and tracker and turns a frame into
+    a published result. Inference cost is independent of the number of
+    connected clients: API endpoints and the database writer only read from
+    the shared store.
+    """
+    def __init__(self, camera, detector, store=None, target_fps=5, motion_gate=None,
+                 tracker=None):
+        """
+        Initialize the worker
+
+        Args:
+            camera (Camera): Frame source
+            detector (PersonDetector): Detector used for inference
+            store (DetectionStore): Store receiving results
+            target_fps (float): Maximum inference rate
+            motion_gate (MotionGate): Optional gate skipping static frames
+            tracker (PersonTracker): Optional tracker smoothing counts and boxes
+        """
+        self.camera = camera
+        self.detector = detector
+        self.store = store if store is not None else DetectionStore()
+        self.target_fps = target_fps
+        self.motion_gate = motion_gate
+        self.tracker = tracker
+        self.fps = 0
+        self.last_run = 0
+
+    def set_target_fps(self, target_fps):
+        """
+        Set the maximum inference rate
+
+        Args:
+            target_fps (float): Inferences per second
+        """
+        self.target_fps = max(float(target_fps), 0.1)
+
+    def get_info(self):
+        """
+        Get worker information
+
+        Returns:
+            dict: Dictionary with worker state and statistics
+        """
+        info = {
+            "target_fps": self.target_fps,
+            "fps": round(self.fps, 1),
+        }
+        if self.motion_gate is not None:
+            info["motion"] = self.motion_gate.get_info()
+        return info
+
+    def record_run(self, started):
+        """
+        Track the achieved inference rate
+
+        Args:
+            started (float): Time the latest frame was picked up
+        """
+        if self.last_run > 0:
+            self.fps = 1 / max(started - self.last_run, 1e-6)
+        self.last_run = started
+
+    def get_latency_ms(self):
+        """
+        Get the latency of the most recent inference
+
+        Returns:
+            float: Latency in milliseconds, or None if nothing was inferred yet
+        """
+        result = self.store.get()
+        if result is None or not result.get("inferred"):
+            return None
+        return result["latency_ms"]
+
+    def _scaled(self, frame, seq, size):
+        """Frame at size from the camera's per-frame cache, resizing if evicted"""
+        _, scaled = self.camera.get_scaled(size, seq)
+        if scaled is None:
+            scaled = cv2.resize(frame, tuple(size), interpolation=cv2.INTER_AREA)
+        return scaled
+
+    def process(self, seq, frame, started, detector=None):
+        """
+        Run detection on a frame and publish the result
+
+        Args:
+            seq (int): Camera frame sequence number
+            frame (numpy.ndarray): Read-only frame view to process
+            started (float): Time the frame was picked up
+            detector (PersonDetector): Detector to use instead of the worker's own
+        """
+        if detector is None:
+            detector = self.detector
+
+        height, width = frame.shape[:2]
+
+        # Reuse the previous result when the scene has not changed
+        if self.motion_gate is not None and not self.motion_gate.should_infer(
+            self._scaled(frame, seq, self.motion_gate.size), started
+        ):
+            FRAMES_SKIPPED.inc()
+            previous = self.store.get()
+            if previous is not None:
+                previous.update({"seq": seq, "timestamp": started, "inferred": False})
+                if self.tracker is not None:
+                    previous["tracks"] = self.tracker.predict(started).tolist()
+                    previous["count"] = self.tracker.count
+                self.store.publish(previous)
+                return
+
+        # Settings may change tiling concurrently; decide once for this frame
+        with detector.lock:
+            input_size = detector.get_input_size()
+            tiled = detector.tile_grid is not None or detector.regions is not None
+
+        if input_size is not None:
+            # Share the camera's cached model-size frame; passing the source
+            # size keeps detect() from tiling the shrunk image
+            boxes = detector.detect(self._scaled(frame, seq, input_size), (width, height))
+        else:
+            # Tiles are read over several invokes, during which the camera may
+            # reuse this ring buffer slot
+            if tiled:
+                frame = frame.copy()
+            boxes = detector.detect(frame)
+        latency = time.time() - started
+        FRAMES_INFERRED.inc()
+
+        count = len(boxes)
+        confidence = float(boxes[:, 4].mean()) if count > 0 else 0.0
+
+        result = {
+            "seq": seq,
+            "timestamp": started,
+            "width": width,
+            "height": height,
+            "count": count,
+            "detected_count": count,
+            "confidence": confidence,
+            "boxes": boxes.tolist(),
+            "latency_ms": round(latency * 1000, 1),
+            "inferred": True,
+        }
+
+        # Report stable IDs and a smoothed count when tracking
+        if self.tracker is not None:
+            result["tracks"] = self.tracker.update(boxes, started).tolist()
+            result["count"] = self.tracker.count
+
+        self.store.publish(result)
@@ -0,0 +1,195 @@
+"""
+Adaptive inference governor for Person Detection System
+"""
+import asyncio
+import os
+import time
+from collections import deque
+
+
+class InferenceGovernor:
+    """
+    Adjusts inference rate, tiling and stream rate to the host's headroom
+
+    The governor moves along a ladder of performance levels. Level 0 runs at
+    the configured maximum rates with tiling enabled; each lower level
+    reduces inference and stream FPS and disables tiling. It steps down when
+    the CPU is hot, inference overruns its frame interval or the load is
+    high, and steps back up once all three have recovered. A cooldown
+    between changes keeps it from oscillating around a threshold.
+
+    Tiling is the only input-scale knob: the model's input tensor has a
+    fixed size, so an inference costs the same however small the frame is.
+    """
+    def __init__(self, worker, detector, temperature_reader,
+                 min_inference_fps=1, max_inference_fps=5,
+                 min_stream_fps=2, max_stream_fps=10, levels=5,
+                 temp_high=75.0, temp_low=65.0, load_high=None, load_low=None,
+                 interval=2.0, cooldown=10.0):
+        """
+        Initialize the governor
+
+        Args:
+            worker (DetectionWorker): Worker or scheduler whose inference rate is adjusted
+            detector (PersonDetector): Detector whose tiling is adjusted
+            temperature_reader (callable): Returns CPU temperature in Celsius
+            min_inference_fps (float): Lowest inference rate
+            max_inference_fps (float): Highest inference rate
+            min_stream_fps (float): Lowest MJPEG stream rate
+            max_stream_fps (float): Highest MJPEG stream rate
+            levels (int): Number of steps between the bounds
+            temp_high (float): Temperature that forces a step down
+            temp_low (float): Temperature below which stepping up is allowed
+            load_high (float): 1-minute load that forces a step down, defaults to CPU count
+            load_low (float): Load below which stepping up is allowed
+            interval (float): Seconds between evaluations
+            cooldown (float): Minimum seconds between level changes
+        """
+        self.worker = worker
+        self.detector = detector
+        self.temperature_reader = temperature_reader
+        self.min_inference_fps = min_inference_fps
+        self.max_inference_fps = max_inference_fps
+        self.min_stream_fps = min_stream_fps
+        self.max_stream_fps = max_stream_fps
+        self.levels = max(int(levels), 2)
+        self.temp_high = temp_high
+        self.temp_low = temp_low
+
+        cpus = os.cpu_count() or 1
+        self.load_high = load_high if load_high is not None else float(cpus)
+        self.load_low = load_low if load_low is not None else self.load_high * 0.6
+        self.interval = interval
+        self.cooldown = cooldown
+
+        self.level = 0
+        self.last_change = 0
+        self.latency_ms = 0.0
+        self.saved_tiles = None
+        self.decisions = deque(maxlen=50)
+        self.stream_fps = max_stream_fps
+
+    @property
+    def inference_fps(self):
+        """Inference rate of the current level"""
+        return self._interpolate(self.max_inference_fps, self.min_inference_fps)
+
+    def _interpolate(self, high, low):
+        """Value between high (level 0) and low (last level) for the current level"""
+        fraction = self.level / (self.levels - 1)
+        return round(high - (high - low) * fraction, 2)
+
+    def _read_load(self):
+        """1-minute load average, or 0 where unavailable"""
+        try:
+            return os.getloadavg()[0]
+        except (AttributeError, OSError):
+            return 0.0
+
+    def _observe_latency(self):
+        """Fold the latest inference latency into a moving average"""
+        latency_ms = self.worker.get_latency_ms()
+        if latency_ms is not None:
+            self.latency_ms += 0.3 * (latency_ms - self.latency_ms)
+
+    def evaluate(self, now=None):
+        """
+        Sample host metrics and change level if needed
+
+        Args:
+            now (float): Current time, defaults to time.time()
+
+        Returns:
+            dict: Decision record if the level changed, otherwise None
+        """
+        if now is None:
+            now = time.time()
+
+        self._observe_latency()
+        temperature = self.temperature_reader()
+        load = self._read_load()
+        budget_ms = 1000.0 / self.inference_fps
+
+        reasons = []
+        if temperature >= self.temp_high:
+            reasons.append(f"temperature {temperature}C")
+        if self.latency_ms > 0.9 * budget_ms:
+            reasons.append(f"latency {self.latency_ms:.0f}ms")
+        if load >= self.load_high:
+            reasons.append(f"load {load:.2f}")
+
+        relaxed = (
+            temperature <= self.temp_low
+            and self.latency_ms < 0.5 * budget_ms
+            and load <= self.load_low
+        )
+
+        if now - self.last_change < self.cooldown:
+            return None
+
+        if reasons and self.level < self.levels - 1:
+            return self._set_level(self.level + 1, ", ".join(reasons), now)
+        if not reasons and relaxed and self.level > 0:
+            return self._set_level(self.level - 1, "headroom recovered", now)
+        return None
+
+    def _set_level(self, level, reason, now):
+        """Apply a level and record the decision"""
+        previous = self.level
+        self.level = level
+        self.last_change = now
+
+        self.worker.set_target_fps(self.inference_fps)
+        self.stream_fps = self._interpolate(self.max_stream_fps, self.min_stream_fps)
+
+        # Tiling multiplies inference cost, so only allow it at full speed
+        if level > 0 and previous == 0:
+            self.saved_tiles = self.detector.tile_grid
+            self.detector.set_tiling(1, 1)
+        elif level == 0 and self.saved_tiles is not None:
+            # Only undo our own change; a grid set meanwhile is left alone
+            if self.detector.tile_grid is None:
+                self.detector.set_tiling(*self.saved_tiles, overlap=self.detector.tile_overlap)
+            self.saved_tiles = None
+
+        decision = {
+            "timestamp": int(now),
+            "from_level": previous,
+            "to_level": level,
+            "inference_fps": self.inference_fps,
+            "stream_fps": self.stream_fps,
+            "tiles": self.detector.tile_grid,
+            "reason": reason,
+        }
+        self.decisions.append(decision)
+        print(f"Governor level {previous} -> {level} ({reason}): "
+              f"inference {self.inference_fps} FPS, stream {self.stream_fps} FPS")
+        return decision
+
+    def tiling_changed(self):
+        """Forget the saved tile grid after the user reconfigures tiling"""
+        self.saved_tiles = None
+
+    async def run(self):
+        """Evaluate periodically until cancelled"""
+        while True:
+            try:
+                self.evaluate()
+            except Exception as e:
+                print(f"Governor evaluation failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    def get_info(self):
+        """
+        Get governor state
+
+        Returns:
+            dict: Dictionary with current level, rates and recent decisions
+        """
+        return {
+            "level": self.level,
+            "inference_fps": self.inference_fps,
+            "stream_fps": self.stream_fps,
+            "latency_ms": round(self.latency_ms, 1),
+            "decisions": list(self.decisions)[-10:],
+        }
@@ -0,0 +1,131 @@
+"""
+In-process publish/subscribe hub for live detection results
+"""
+import asyncio
+
+
+class DetectionHub:
+    """
+    Fans the latest detection result of each camera out to subscribers
+
+    Workers publish from their own threads; results are handed to the event
+    loop and pushed into one bounded asyncio queue per subscriber, so live
+    endpoints wait for changes instead of polling. A subscriber whose queue
+    is full is evicted and its stream ends, letting the browser reconnect
+    fresh rather than letting a slow client hold back memory.
+    """
+    def __init__(self, max_queue=8):
+        """
+        Initialize the hub
+
+        Args:
+            max_queue (int): Results buffered per subscriber before eviction
+        """
+        self.max_queue = max(int(max_queue), 1)
+        self.loop = None
+        self.latest = {}
+        self.subscribers = {}
+        self.published = 0
+        self.evicted = 0
+
+    def bind(self, loop):
+        """
+        Attach the event loop subscribers run on
+
+        Args:
+            loop (asyncio.AbstractEventLoop): Loop used for thread-safe publishing
+        """
+        self.loop = loop
+
+    def publish_threadsafe(self, camera_id, result):
+        """
+        Publish a result from any thread
+
+        Args:
+            camera_id (str): Camera the result belongs to
+            result (dict): Detection result
+        """
+        if self.loop is None:
+            return
+        try:
+            self.loop.call_soon_threadsafe(self.publish, camera_id, result)
+        except RuntimeError:
+            pass  # Event loop already closed
+
+    def publish(self, camera_id, result):
+        """
+        Publish a result; must be called on the event loop
+
+        Args:
+            camera_id (str): Camera the result belongs to
+            result (dict): Detection result
+        """
+        camera_id = str(camera_id)
+        self.latest[camera_id] = result
+        self.published += 1
+
+        for queue in list(self.subscribers.get(camera_id, ())):
+            try:
+                queue.put_nowait(result)
+            except asyncio.QueueFull:
+                self._evict(camera_id, queue)
+
+    def _evict(self, camera_id, queue):
+        """Drop a subscriber that stopped reading and wake it with None"""
+        self.subscribers[camera_id].discard(queue)
+        self.evicted += 1
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(None)
+
+    def subscribe(self, camera_id):
+        """
+        Subscribe to a camera's results, starting with the latest one
+
+        Args:
+            camera_id (str): Camera identifier
+
+        Returns:
+            asyncio.Queue: Queue of results; None means the subscriber was evicted
+        """
+        camera_id = str(camera_id)
+        queue = asyncio.Queue(maxsize=self.max_queue)
+        if camera_id in self.latest:
+            queue.put_nowait(self.latest[camera_id])
+        self.subscribers.setdefault(camera_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, camera_id, queue):
+        """
+        Remove a subscription
+
+        Args:
+            camera_id (str): Camera identifier
+            queue (asyncio.Queue): Queue returned by subscribe()
+        """
+        self.subscribers.get(str(camera_id), set()).discard(queue)
+
+    def get(self, camera_id):
+        """
+        Get the latest result of a camera
+
+        Args:
+            camera_id (str): Camera identifier
+
+        Returns:
+            dict: Latest result, or None if nothing was published
+        """
+        return self.latest.get(str(camera_id))
+
+    def get_info(self):
+        """
+        Get hub statistics
+
+        Returns:
+            dict: Dictionary with subscriber and publish counters
+        """
+        return {
+            "subscribers": {camera_id: len(queues) for camera_id, queues in self.subscribers.items()},
+            "published": self.published,
+            "evicted": self.evicted,
+        }
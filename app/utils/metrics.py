@@ -0,0 +1,275 @@
+"""
+Pipeline metrics in Prometheus text format for Person Detection System
+"""
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+
+# Latency buckets in seconds, from sub-millisecond resizes to slow inference
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+)
+
+
+def _escape_label_value(value):
+    """Escape a label value as the text exposition format requires"""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels):
+    """Render a label dict as {name="value",...}"""
+    if not labels:
+        return ""
+    pairs = ",".join(f'{name}="{_escape_label_value(value)}"' for name, value in labels.items())
+    return "{" + pairs + "}"
+
+
+class Counter:
+    """
+    Monotonic counter with an optional single label
+    """
+    def __init__(self, name, documentation, label=None):
+        """
+        Initialize the counter
+
+        Args:
+            name (str): Metric name
+            documentation (str): Help text
+            label (str): Label name, or None for an unlabelled counter
+        """
+        self.name = name
+        self.documentation = documentation
+        self.label = label
+        self.lock = threading.Lock()
+        self.values = {}
+
+    def inc(self, amount=1, label_value=None):
+        """
+        Increase the counter
+
+        Args:
+            amount (float): Increment
+            label_value (str): Value of the counter's label
+        """
+        with self.lock:
+            self.values[label_value] = self.values.get(label_value, 0) + amount
+
+    def get(self, label_value=None):
+        """Current value for a label value"""
+        return self.values.get(label_value, 0)
+
+    def render(self):
+        """Prometheus text lines for the counter"""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self.lock:
+            values = dict(self.values) or {None: 0}
+        for label_value, value in values.items():
+            labels = {self.label: label_value} if self.label and label_value is not None else None
+            lines.append(f"{self.name}{_format_labels(labels)} {value}")
+        return lines
+
+
+class Histogram:
+    """
+    Bucketed histogram with an optional single label
+
+    Observations cost one bisect and a few integer updates, so timers can
+    sit on the hot path. Quantiles are estimated from the buckets the same
+    way Prometheus' histogram_quantile() does.
+    """
+    def __init__(self, name, documentation, label=None, buckets=DEFAULT_BUCKETS):
+        """
+        Initialize the histogram
+
+        Args:
+            name (str): Metric name
+            documentation (str): Help text
+            label (str): Label name, or None for an unlabelled histogram
+            buckets (tuple): Sorted upper bounds, +Inf is implied
+        """
+        self.name = name
+        self.documentation = documentation
+        self.label = label
+        self.buckets = tuple(buckets)
+        self.lock = threading.Lock()
+        self.series = {}
+
+    def observe(self, value, label_value=None):
+        """
+        Record an observation
+
+        Args:
+            value (float): Observed value
+            label_value (str): Value of the histogram's label
+        """
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            series = self.series.get(label_value)
+            if series is None:
+                series = self.series[label_value] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, label_value=None):
+        """Context manager observing the duration of its block in seconds"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, label_value)
+
+    def quantile(self, q, label_value=None):
+        """
+        Estimate a quantile by linear interpolation within its bucket
+
+        Args:
+            q (float): Quantile between 0 and 1
+            label_value (str): Value of the histogram's label
+
+        Returns:
+            float: Estimated value, or None without observations
+        """
+        with self.lock:
+            series = self.series.get(label_value)
+            if series is None or series[2] == 0:
+                return None
+            counts = list(series[0])
+            total = series[2]
+
+        rank = q * total
+        cumulative = 0
+        for i, count in enumerate(counts):
+            if count and cumulative + count >= rank:
+                if i == len(self.buckets):
+                    return self.buckets[-1]  # Beyond the largest bucket
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                upper = self.buckets[i]
+                return lower + (upper - lower) * (rank - cumulative) / count
+            cumulative += count
+        return self.buckets[-1]
+
+    def summary(self):
+        """
+        Get p50/p95/p99 in milliseconds per label value
+
+        Returns:
+            dict: Label value to quantiles and observation count
+        """
+        result = {}
+        for label_value in list(self.series):
+            result[label_value] = {
+                name: round(self.quantile(q, label_value) * 1000, 2)
+                for name, q in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99))
+            }
+            result[label_value]["count"] = self.series[label_value][2]
+        return result
+
+    def render(self):
+        """Prometheus text lines for the histogram"""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self.lock:
+            series = {key: (list(value[0]), value[1], value[2]) for key, value in self.series.items()}
+
+        for label_value, (counts, total_sum, total_count) in series.items():
+            labels = {self.label: label_value} if self.label and label_value is not None else {}
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{self.name}_bucket{_format_labels({**labels, 'le': le})} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {total_sum}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {total_count}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Collection of metrics rendered together for the /metrics endpoint
+
+    Besides registered metrics, collectors can be added: callables run at
+    scrape time that return (name, type, help, [(labels, value), ...])
+    tuples, for values that components already track, such as camera frame
+    counters, so those cost nothing on the hot path.
+    """
+    def __init__(self):
+        """Initialize an empty registry"""
+        self.metrics = []
+        self.collectors = []
+
+    def register(self, metric):
+        """
+        Add a metric
+
+        Args:
+            metric: Counter or Histogram
+
+        Returns:
+            The metric, for assignment at module level
+        """
+        self.metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector):
+        """
+        Add a scrape-time collector
+
+        Args:
+            collector (callable): Returns a list of metric family tuples
+        """
+        self.collectors.append(collector)
+
+    def render(self):
+        """
+        Render every metric in Prometheus text exposition format
+
+        Returns:
+            str: Exposition text
+        """
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+
+        for collector in self.collectors:
+            try:
+                families = collector()
+            except Exception as e:
+                print(f"Metrics collector failed: {e}")
+                continue
+            for name, metric_type, documentation, samples in families:
+                lines.append(f"# HELP {name} {documentation}")
+                lines.append(f"# TYPE {name} {metric_type}")
+                for labels, value in samples:
+                    lines.append(f"{name}{_format_labels(labels)} {value}")
+
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    "person_detection_stage_seconds",
+    "Time spent in each pipeline stage",
+    label="stage",
+))
+FRAMES_INFERRED = REGISTRY.register(Counter(
+    "person_detection_frames_inferred_total",
+    "Frames passed through the detector",
+))
+FRAMES_SKIPPED = REGISTRY.register(Counter(
+    "person_detection_frames_skipped_total",
+    "Frames whose inference was skipped by the motion gate",
+))
+ROWS_WRITTEN = REGISTRY.register(Counter(
+    "person_detection_db_rows_written_total",
+    "Detection rows committed to the database",
+))
+ROWS_DROPPED = REGISTRY.register(Counter(
+    "person_detection_db_rows_dropped_total",
+    "Detection rows lost to write-behind queue overflow or failed flushes",
+    label="reason",
+))
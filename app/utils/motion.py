@@ -0,0 +1,98 @@
+"""
+Motion gate for skipping inference on static scenes
+"""
+import time
+import cv2
+import numpy as np
+
+
+class MotionGate:
+    """
+    Cheap frame-differencing gate placed in front of the detector
+
+    Frames are downscaled to a small grayscale image and compared against a
+    running background average. Inference is only requested when enough
+    pixels changed, or when the last inference is older than max_staleness.
+    """
+    def __init__(self, size=(80, 60), pixel_threshold=25, min_changed_fraction=0.01,
+                 alpha=0.1, max_staleness=5.0):
+        """
+        Initialize the motion gate
+
+        Args:
+            size (tuple): Downscaled (width, height) used for comparison
+            pixel_threshold (int): Gray level difference counted as change
+            min_changed_fraction (float): Fraction of changed pixels that counts as motion
+            alpha (float): Running average weight of the newest frame
+            max_staleness (float): Seconds after which inference is forced
+        """
+        self.size = size
+        self.pixel_threshold = pixel_threshold
+        self.min_changed_fraction = min_changed_fraction
+        self.alpha = alpha
+        self.max_staleness = max_staleness
+        self.background = None
+        self.last_inference = 0
+        self.checked = 0
+        self.skipped = 0
+
+    @property
+    def skip_ratio(self):
+        """Fraction of checked frames for which inference was skipped"""
+        return self.skipped / self.checked if self.checked else 0.0
+
+    def reset(self):
+        """Forget the background so the next frame is always inferred"""
+        self.background = None
+        self.last_inference = 0
+
+    def should_infer(self, frame, now=None):
+        """
+        Decide whether a frame needs a fresh inference
+
+        Args:
+            frame (numpy.ndarray): BGR camera frame, or a thumbnail already
+                at the gate's size
+            now (float): Current time, defaults to time.time()
+
+        Returns:
+            bool: True if the detector should run on this frame
+        """
+        if now is None:
+            now = time.time()
+        self.checked += 1
+
+        small = frame
+        if frame.shape[1::-1] != tuple(self.size):
+            small = cv2.resize(frame, self.size, interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY).astype(np.float32)
+
+        if self.background is None or self.background.shape != gray.shape:
+            self.background = gray
+            self.last_inference = now
+            return True
+
+        # Fraction of pixels that differ from the background average
+        diff = cv2.absdiff(gray, self.background)
+        changed = np.count_nonzero(diff > self.pixel_threshold) / diff.size
+        cv2.accumulateWeighted(gray, self.background, self.alpha)
+
+        if changed >= self.min_changed_fraction or now - self.last_inference >= self.max_staleness:
+            self.last_inference = now
+            return True
+
+        self.skipped += 1
+        return False
+
+    def get_info(self):
+        """
+        Get motion gate statistics
+
+        Returns:
+            dict: Dictionary with gate counters
+        """
+        return {
+            "checked": self.checked,
+            "skipped": self.skipped,
+            "skip_ratio": round(self.skip_ratio, 3),
+        }
@@ -0,0 +1,295 @@
+"""
+Shared inference scheduler for multiple cameras
+"""
+import threading
+import time
+from app.utils.detection_worker import DetectionStore, DetectionWorker
+
+
+class InferenceScheduler:
+    """
+    Time-slices a small pool of detectors across many cameras
+
+    Each camera gets a channel (a DetectionWorker, which has no thread of
+    its own) holding its store, motion gate and tracker. One thread per
+    detector in the pool repeatedly picks the next camera that has a new
+    frame and is due for inference, either in round-robin order or by
+    priority-weighted lateness, so a single model in memory serves every
+    camera. Idle threads sleep on a condition that cameras signal when they
+    publish a frame, and otherwise only until the next camera falls due.
+    """
+    def __init__(self, manager, detectors, target_fps=5, policy="round_robin",
+                 motion_gate_factory=None, tracker_factory=None):
+        """
+        Initialize the scheduler
+
+        Args:
+            manager (CameraManager): Cameras to serve
+            detectors (list): Pool of PersonDetector instances, one thread each
+            target_fps (float): Maximum inference rate per camera
+            policy (str): "round_robin" or "priority"
+            motion_gate_factory (callable): Creates a MotionGate per camera
+            tracker_factory (callable): Creates a PersonTracker per camera
+        """
+        if policy not in ("round_robin", "priority"):
+            raise ValueError(f"Unknown scheduling policy: {policy}")
+
+        self.manager = manager
+        self.detectors = list(detectors)
+        self.target_fps = target_fps
+        self.policy = policy
+        self.motion_gate_factory = motion_gate_factory
+        self.tracker_factory = tracker_factory
+
+        self.lock = threading.Lock()
+        self.wakeup = threading.Condition(self.lock)
+        self.channels = {}
+        self.priorities = {}
+        self.last_seq = {}
+        self.next_due = {}
+        self.busy = set()
+        self.order = []
+        self.cursor = 0
+        self.stopped = True
+        self.threads = []
+
+        for camera_id, _ in manager.items():
+            self.add_camera(camera_id)
+
+    def add_camera(self, camera_id, priority=1.0):
+        """
+        Create a channel for a camera registered with the manager
+
+        Args:
+            camera_id (str): Camera identifier
+            priority (float): Relative weight under the priority policy
+
+        Returns:
+            DetectionWorker: The camera's channel
+        """
+        camera_id = str(camera_id)
+        camera = self.manager.get(camera_id)
+        if camera is None:
+            raise ValueError(f"Unknown camera: {camera_id}")
+
+        channel = DetectionWorker(
+            camera,
+            self.detectors[0],
+            DetectionStore(),
+            target_fps=self.target_fps,
+            motion_gate=self.motion_gate_factory() if self.motion_gate_factory else None,
+            tracker=self.tracker_factory() if self.tracker_factory else None,
+        )
+
+        with self.lock:
+            self.channels[camera_id] = channel
+            self.priorities[camera_id] = float(priority)
+            self.last_seq[camera_id] = 0
+            self.next_due[camera_id] = 0
+            if camera_id not in self.order:
+                self.order.append(camera_id)
+        camera.add_frame_listener(self._frame_published)
+        return channel
+
+    def remove_camera(self, camera_id):
+        """
+        Drop a camera's channel
+
+        Args:
+            camera_id (str): Camera identifier
+        """
+        camera_id = str(camera_id)
+        with self.lock:
+            channel = self.channels.pop(camera_id, None)
+            self.priorities.pop(camera_id, None)
+            self.last_seq.pop(camera_id, None)
+            self.next_due.pop(camera_id, None)
+            if camera_id in self.order:
+                self.order.remove(camera_id)
+        if channel is not None:
+            channel.camera.remove_frame_listener(self._frame_published)
+
+    def _frame_published(self):
+        """Wake idle scheduling threads; called from camera capture threads"""
+        with self.wakeup:
+            self.wakeup.notify_all()
+
+    def get_channel(self, camera_id):
+        """
+        Get a camera's channel
+
+        Args:
+            camera_id (str): Camera identifier
+
+        Returns:
+            DetectionWorker: Channel, or None if unknown
+        """
+        with self.lock:
+            return self.channels.get(str(camera_id))
+
+    def set_priority(self, camera_id, priority):
+        """
+        Set a camera's weight under the priority policy
+
+        Args:
+            camera_id (str): Camera identifier
+            priority (float): Relative weight
+        """
+        with self.lock:
+            if str(camera_id) in self.priorities:
+                self.priorities[str(camera_id)] = max(float(priority), 0.01)
+
+    def set_target_fps(self, target_fps):
+        """
+        Set the maximum inference rate per camera
+
+        Args:
+            target_fps (float): Inferences per second
+        """
+        self.target_fps = max(float(target_fps), 0.1)
+        with self.lock:
+            for channel in self.channels.values():
+                channel.set_target_fps(self.target_fps)
+
+    def get_latency_ms(self):
+        """
+        Get the worst recent inference latency across cameras
+
+        Returns:
+            float: Latency in milliseconds, or None if nothing was inferred yet
+        """
+        with self.lock:
+            channels = list(self.channels.values())
+        latencies = [c.get_latency_ms() for c in channels]
+        latencies = [latency for latency in latencies if latency is not None]
+        return max(latencies) if latencies else None
+
+    def _ready(self, camera_id, now):
+        """Whether a camera has a new frame and is due; caller holds the lock"""
+        channel = self.channels[camera_id]
+        return (
+            camera_id not in self.busy
+            and now >= self.next_due[camera_id]
+            and channel.camera.frame_seq > self.last_seq[camera_id]
+        )
+
+    def _idle_timeout(self, now):
+        """
+        Seconds until a camera with an unprocessed frame falls due; caller holds the lock
+
+        Cameras still waiting for a frame are woken by _frame_published(),
+        so they only bound the wait to keep stop() responsive.
+        """
+        pending = [
+            self.next_due[cid] - now
+            for cid in self.order
+            if cid not in self.busy and self.channels[cid].camera.frame_seq > self.last_seq[cid]
+        ]
+        return min([0.5] + [max(delay, 0.001) for delay in pending])
+
+    def _next_job(self):
+        """
+        Claim the next camera to run inference on, waiting while nothing is due
+
+        Returns:
+            tuple: (camera_id, channel, seq, frame, started), or None if nothing
+                became due before the wait timed out
+        """
+        now = time.time()
+        with self.lock:
+            candidates = [cid for cid in self.order if self._ready(cid, now)]
+            if not candidates:
+                self.wakeup.wait(self._idle_timeout(now))
+                return None
+
+            if self.policy == "priority":
+                # Most overdue camera first, weighted by its priority
+                camera_id = max(
+                    candidates,
+                    key=lambda cid: self.priorities[cid] * (now - self.next_due[cid] + 1.0 / self.target_fps),
+                )
+            else:
+                # First ready camera at or after the cursor
+                n = len(self.order)
+                ranked = sorted(candidates, key=lambda cid: (self.order.index(cid) - self.cursor) % n)
+                camera_id = ranked[0]
+                self.cursor = (self.order.index(camera_id) + 1) % n
+
+            channel = self.channels[camera_id]
+            # Passthrough frames are decoded by _run() once the lock is released
+            seq, frame = channel.camera.read_latest(copy=False, decode=False)
+            if frame is None:
+                return None
+
+            self.busy.add(camera_id)
+            self.last_seq[camera_id] = seq
+            self.next_due[camera_id] = now + 1.0 / self.target_fps
+            return camera_id, channel, seq, frame, now
+
+    def _run(self, detector):
+        """Internal thread function serving cameras with one detector"""
+        while not self.stopped:
+            job = self._next_job()
+            if job is None:
+                continue
+
+            camera_id, channel, seq, frame, started = job
+            try:
+                if not channel.camera.decode_frame(seq):
+                    continue  # Overwritten before it could be decoded
+                channel.process(seq, frame, started, detector)
+                channel.record_run(started)
+            except Exception as e:
+                print(f"Detection failed on camera {camera_id}: {e}")
+            finally:
+                with self.lock:
+                    self.busy.discard(camera_id)
+                    # A frame may have arrived while this camera was busy
+                    self.wakeup.notify_all()
+
+    def start(self):
+        """Start one scheduling thread per detector"""
+        if not self.stopped:
+            return  # Already running
+
+        self.stopped = False
+        self.threads = []
+        for detector in self.detectors:
+            thread = threading.Thread(target=self._run, args=(detector,))
+            thread.daemon = True
+            thread.start()
+            self.threads.append(thread)
+
+    def stop(self):
+        """Stop all scheduling threads"""
+        self.stopped = True
+        with self.wakeup:
+            self.wakeup.notify_all()
+        for thread in self.threads:
+            thread.join(timeout=2.0)
+        self.threads = []
+
+    def get_info(self):
+        """
+        Get scheduler information
+
+        Returns:
+            dict: Dictionary with policy, pool size and per-camera channel state
+        """
+        with self.lock:
+            channels = dict(self.channels)
+            priorities = dict(self.priorities)
+
+        cameras = {}
+        for camera_id, channel in channels.items():
+            cameras[camera_id] = channel.get_info()
+            cameras[camera_id]["running"] = not self.stopped
+            cameras[camera_id]["priority"] = priorities.get(camera_id)
+
+        return {
+            "running": not self.stopped,
+            "policy": self.policy,
+            "detectors": len(self.detectors),
+            "target_fps": self.target_fps,
+            "cameras": cameras,
+        }
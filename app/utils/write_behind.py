@@ -0,0 +1,124 @@
+"""
+Write-behind queue for detection persistence
+"""
+import asyncio
+import time
+from collections import deque
+from app.utils.metrics import ROWS_DROPPED, ROWS_WRITTEN
+
+
+class DetectionWriteQueue:
+    """
+    Buffers detection rows in memory and commits them in batches
+
+    Rows are flushed in one transaction whenever max_batch rows are waiting
+    or flush_interval has passed since the last flush, so the SD card sees
+    one commit per batch instead of one per detection. The queue is bounded:
+    on overflow the oldest rows are dropped and counted. stop() always
+    flushes what is left.
+    """
+    def __init__(self, db, max_batch=50, flush_interval=2.0, max_queue=1000):
+        """
+        Initialize the queue
+
+        Args:
+            db (Database): Database the rows are written to
+            max_batch (int): Rows that trigger an early flush
+            flush_interval (float): Maximum seconds a row waits in memory
+            max_queue (int): Rows kept before the oldest are dropped
+        """
+        self.db = db
+        self.max_batch = max(int(max_batch), 1)
+        self.flush_interval = flush_interval
+        self.rows = deque(maxlen=max(int(max_queue), self.max_batch))
+        self.wakeup = None
+        self.stopping = False
+        self.task = None
+        self.last_flush = time.time()
+        self.flushes = 0
+
+    def submit(self, count, confidence, camera_id="0", timestamp=None):
+        """
+        Queue a detection row without waiting for the database
+
+        Args:
+            count (int): Number of persons detected
+            confidence (float): Confidence level
+            camera_id (str): Camera the detection came from
+            timestamp (float): Detection time, defaults to now
+        """
+        if len(self.rows) == self.rows.maxlen:
+            ROWS_DROPPED.inc(label_value="overflow")
+        self.rows.append((timestamp or time.time(), count, confidence, str(camera_id)))
+        if len(self.rows) >= self.max_batch and self.wakeup is not None:
+            self.wakeup.set()
+
+    async def flush(self):
+        """
+        Write every queued row in one transaction
+
+        Returns:
+            int: Number of rows written
+        """
+        rows = list(self.rows)
+        self.rows.clear()
+        self.last_flush = time.time()
+        if not rows:
+            return 0
+
+        if await self.db.store_detections(rows):
+            ROWS_WRITTEN.inc(len(rows))
+            self.flushes += 1
+            return len(rows)
+
+        ROWS_DROPPED.inc(len(rows), label_value="error")
+        return 0
+
+    async def run(self):
+        """Flush on batch size or interval until stop() is called"""
+        while not self.stopping:
+            timeout = max(self.flush_interval - (time.time() - self.last_flush), 0)
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+            self.wakeup.clear()
+            if self.stopping:
+                break
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"Detection flush failed: {e}")
+
+    def start(self):
+        """Start the background flush task"""
+        if self.task is None:
+            # Created here so the event belongs to the running loop
+            self.wakeup = asyncio.Event()
+            self.stopping = False
+            self.task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        """Stop the flush task and write out any remaining rows"""
+        if self.task is not None:
+            # Let an in-flight flush finish; cancelling it would lose its rows
+            self.stopping = True
+            self.wakeup.set()
+            await self.task
+            self.task = None
+        await self.flush()
+
+    def get_info(self):
+        """
+        Get queue statistics
+
+        Returns:
+            dict: Dictionary with queue depth and write counters
+        """
+        return {
+            "queued": len(self.rows),
+            "max_queue": self.rows.maxlen,
+            "flushes": self.flushes,
+            "rows_written": ROWS_WRITTEN.get(),
+            "rows_dropped": ROWS_DROPPED.get("overflow") + ROWS_DROPPED.get("error"),
+        }
@@ -0,0 +1,4 @@
+"""
+Pytest configuration; its presence puts the repository root on sys.path
+so tests can import the app package when run as plain pytest
+"""
@@ -0,0 +1,146 @@
+"""
+Tests for the detection database schema migrations and batch writes
+"""
+import asyncio
+import sqlite3
+
+from app.utils.database import Database
+
+
+# Schema written by the original release, before user_version was tracked
+BASELINE_SCHEMA = """
+CREATE TABLE detections (
+    timestamp INTEGER PRIMARY KEY,
+    count INTEGER,
+    confidence REAL
+);
+CREATE TABLE settings (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE errors (
+    timestamp INTEGER PRIMARY KEY,
+    message TEXT,
+    resolved INTEGER DEFAULT 0
+);
+"""
+
+BASE_TIME = 1_699_999_200  # Minute- and hour-aligned
+
+
+def create_baseline(path, rows):
+    """Write a baseline database holding (timestamp, count, confidence) rows"""
+    connection = sqlite3.connect(path)
+    connection.executescript(BASELINE_SCHEMA)
+    connection.executemany(
+        "INSERT INTO detections (timestamp, count, confidence) VALUES (?, ?, ?)", rows
+    )
+    connection.execute("INSERT INTO settings (key, value) VALUES ('theme', 'dark')")
+    connection.commit()
+    connection.close()
+
+
+def run(db, coroutine_function):
+    """Initialize db, run coroutine_function(db) and always close the connections"""
+    async def main():
+        await db.initialize()
+        try:
+            return await coroutine_function(db)
+        finally:
+            await db.close()
+    return asyncio.run(main())
+
+
+async def fetch(db, query, params=()):
+    async with db.connection.execute(query, params) as cursor:
+        return await cursor.fetchall()
+
+
+def test_migrates_baseline_schema(tmp_path):
+    path = str(tmp_path / "detection.db")
+    create_baseline(path, [
+        (BASE_TIME, 2, 0.8),
+        (BASE_TIME + 30, 4, 0.6),
+        (BASE_TIME + 90, 1, None),
+    ])
+
+    async def check(db):
+        version = await db._pragma_value("user_version")
+        detections = await fetch(
+            db, "SELECT camera_id, timestamp_ms, count, confidence FROM detections ORDER BY timestamp_ms"
+        )
+        minutes = await fetch(
+            db, "SELECT bucket, samples, sum_count, min_count, max_count FROM detections_minute ORDER BY bucket"
+        )
+        primary_key = await fetch(
+            db, "SELECT name FROM pragma_table_info('detections') WHERE pk > 0 ORDER BY pk"
+        )
+        unique_indexes = await fetch(
+            db, "SELECT name FROM pragma_index_list('detections') WHERE \"unique\" = 1"
+        )
+        setting = await db.get_setting("theme")
+        return version, detections, minutes, primary_key, unique_indexes, setting
+
+    version, detections, minutes, primary_key, unique_indexes, setting = run(Database(path), check)
+
+    assert version == len(Database.MIGRATIONS)
+    assert detections == [
+        ("0", BASE_TIME * 1000, 2, 800),
+        ("0", (BASE_TIME + 30) * 1000, 4, 600),
+        ("0", (BASE_TIME + 90) * 1000, 1, 0),
+    ]
+    assert minutes == [(BASE_TIME, 2, 6, 2, 4), (BASE_TIME + 60, 1, 1, 1, 1)]
+    # Uniqueness is exactly one row per camera and millisecond
+    assert [name for (name,) in primary_key] == ["camera_id", "timestamp_ms"]
+    assert len(unique_indexes) == 1
+    assert setting == "dark"
+
+
+def test_migration_is_idempotent(tmp_path):
+    path = str(tmp_path / "detection.db")
+    create_baseline(path, [(BASE_TIME, 2, 0.8)])
+
+    async def count_rows(db):
+        return (await fetch(db, "SELECT COUNT(*), SUM(samples) FROM detections_hour"))[0]
+
+    assert run(Database(path), count_rows) == (1, 1)
+    assert run(Database(path), count_rows) == (1, 1)
+
+
+def test_duplicate_rows_are_not_counted_in_rollups(tmp_path):
+    path = str(tmp_path / "detection.db")
+
+    async def store_twice(db):
+        first = [(BASE_TIME + 1.5, 3, 0.9, "0"), (BASE_TIME + 1.5, 3, 0.9, "1")]
+        assert await db.store_detections(first)
+        # Same camera and millisecond with a different count and confidence
+        assert await db.store_detections([(BASE_TIME + 1.5, 5, 0.5, "0"), (BASE_TIME + 2, 1, 0.5, "0")])
+        raw = await fetch(db, "SELECT COUNT(*) FROM detections")
+        rollup = await fetch(
+            db, "SELECT samples, sum_count, max_count FROM detections_minute WHERE camera_id = '0'"
+        )
+        return raw[0][0], rollup
+
+    raw_count, rollup = run(Database(path), store_twice)
+
+    assert raw_count == 3
+    assert rollup == [(2, 4, 3)]
+
+
+def test_concurrent_callers_share_initialization(tmp_path):
+    path = str(tmp_path / "detection.db")
+    create_baseline(path, [(BASE_TIME, 2, 0.8)])
+    db = Database(path)
+
+    async def main():
+        try:
+            # A request may arrive while startup is still migrating
+            results = await asyncio.gather(
+                db.get_setting("theme"), db.initialize(), db.initialize(),
+                db.get_detection_history(1),
+            )
+            return results[0], await db._pragma_value("user_version")
+        finally:
+            await db.close()
+
+    assert asyncio.run(main()) == ("dark", len(Database.MIGRATIONS))
@@ -0,0 +1,168 @@
+"""
+Tests for the detector's post-processing, tiling, regions of interest and box merging
+"""
+import numpy as np
+
+from app.models.backends import InferenceBackend
+from app.models.detector import PersonDetector, non_max_suppression
+
+
+SLOTS = 4  # Fixed SSD output size, as the post-processing op pads to it
+
+
+class FakeBackend(InferenceBackend):
+    """Backend that replays scripted SSD outputs, one per invoke()"""
+    name = "fake"
+
+    def __init__(self, outputs, input_shape=(300, 300)):
+        super().__init__(__file__)
+        self.outputs = list(outputs)
+        self.input_shape = tuple(input_shape)
+        self.invocations = 0
+
+    def load(self):
+        self._input = np.zeros((self.input_shape[0], self.input_shape[1], 3), dtype=np.uint8)
+        self.loaded = True
+
+    def input_view(self):
+        return self._input
+
+    def invoke(self):
+        self.invocations += 1
+        return self.outputs.pop(0)
+
+
+def ssd_output(*detections):
+    """Build raw outputs from (normalized [y1, x1, y2, x2], score) person detections"""
+    boxes = np.zeros((SLOTS, 4), dtype=np.float32)
+    classes = np.zeros(SLOTS, dtype=np.float32)
+    scores = np.zeros(SLOTS, dtype=np.float32)
+    for i, (box, score) in enumerate(detections):
+        boxes[i] = box
+        scores[i] = score
+    return boxes, classes, scores
+
+
+def make_detector(outputs):
+    """Create a detector whose model loads onto a FakeBackend"""
+    detector = PersonDetector(model_path=__file__)
+    backend = FakeBackend(outputs)
+    detector._create_backend = lambda name: backend
+    detector.load_model()
+    return detector, backend
+
+
+def test_non_max_suppression_keeps_best_boxes_by_confidence():
+    boxes = np.array([
+        [0, 0, 100, 100, 0.6],
+        [200, 200, 50, 50, 0.7],
+        [5, 5, 100, 100, 0.9],  # Overlaps the first box
+        [400, 0, 20, 20, 0.6],
+    ], dtype=np.float32)
+
+    kept = non_max_suppression(boxes, 0.5)
+
+    np.testing.assert_array_equal(kept, boxes[[2, 1, 3]])
+
+
+def test_tile_windows_overlap_and_cover_frame():
+    detector = PersonDetector()
+    detector.set_tiling(2, 2, overlap=0.2)
+
+    windows = detector.get_windows(640, 480)
+
+    # Tiles are 640 / 1.8 by 480 / 1.8 pixels, stepping 80% of their size
+    np.testing.assert_array_equal(windows, [
+        [0, 0, 356, 267],
+        [284, 0, 356, 267],
+        [0, 213, 356, 267],
+        [284, 213, 356, 267],
+    ])
+    assert windows.dtype == np.int32
+
+
+def test_windows_follow_regions_of_interest():
+    detector = PersonDetector()
+    detector.set_regions([[0.5, 0.5, 0.5, 0.5]])
+    np.testing.assert_array_equal(detector.get_windows(640, 480), [[320, 240, 320, 240]])
+
+    # Tiles entirely outside every region are skipped
+    detector.set_tiling(2, 2, overlap=0.2)
+    detector.set_regions([[0, 0, 0.3, 0.3]])
+    np.testing.assert_array_equal(detector.get_windows(640, 480), [[0, 0, 356, 267]])
+
+
+def test_detect_tiled_maps_boxes_to_frame_and_merges_duplicates():
+    # Windows are [0, 0, 356, 480] and [284, 0, 356, 480]
+    detector, backend = make_detector([
+        ssd_output(([0.25, 0.25, 0.75, 0.5], 0.8), ([0.5, 0.875, 1.0, 0.96875], 0.6)),
+        ssd_output(([0.25, 0.5, 0.75, 0.75], 0.9), ([0.5, 0.078125, 1.0, 0.171875], 0.7)),
+    ])
+    detector.set_tiling(2, 1, overlap=0.2)
+
+    boxes = detector.detect(np.zeros((480, 640, 3), dtype=np.uint8))
+
+    assert backend.invocations == 2
+    # The person in the overlap is kept once, from the more confident tile
+    np.testing.assert_allclose(boxes, [
+        [462, 120, 89, 240, 0.9],
+        [89, 120, 89, 240, 0.8],
+        [311, 240, 33, 240, 0.7],
+    ], atol=1)
+
+
+def test_detect_tiled_drops_boxes_centered_outside_regions():
+    detector, backend = make_detector([
+        ssd_output(([0.25, 0.125, 0.75, 0.375], 0.8), ([0.25, 0.625, 0.75, 0.875], 0.9)),
+    ])
+    detector.set_tiling(2, 1, overlap=0.2)
+    detector.set_regions([[0, 0, 0.25, 1]])
+
+    boxes = detector.detect(np.zeros((480, 640, 3), dtype=np.uint8))
+
+    # Only the left tile meets the region, and only its left box is centered in it
+    assert backend.invocations == 1
+    np.testing.assert_allclose(boxes, [[44, 120, 89, 240, 0.8]], atol=1)
+
+
+def reference_postprocess(boxes, classes, scores, scale, offset, threshold):
+    """Per-slot loop the vectorized post-processing replaced, for a single frame"""
+    result_boxes = []
+    for i in range(len(scores)):
+        if scores[i] >= threshold and classes[i] == 0:
+            box = boxes[i]
+            x = int(box[1] * scale[1] + offset[1])
+            y = int(box[0] * scale[0] + offset[0])
+            w = int((box[3] - box[1]) * scale[1])
+            h = int((box[2] - box[0]) * scale[0])
+            result_boxes.append([x, y, w, h, scores[i]])
+    return np.array(result_boxes, dtype=np.float32).reshape(-1, 5)
+
+
+def test_postprocess_matches_per_slot_loop():
+    rng = np.random.default_rng(0)
+    batch, slots = 4, 25
+    corners = np.sort(rng.random((batch, slots, 2, 2), dtype=np.float32), axis=2)
+    boxes = corners.transpose(0, 1, 3, 2).reshape(batch, slots, 4)
+    classes = rng.integers(0, 3, (batch, slots)).astype(np.float32)
+    scores = rng.random((batch, slots), dtype=np.float32)
+    classes[0, 0], scores[0, 0] = 0, 0.5  # Exactly at the threshold
+    scores[2] = 0  # A frame without detections
+
+    # Plain frames, then 640x480 and 480x640 letterboxed into a 300x300 input
+    ratio = np.float32(300 / 640)
+    scales = np.array([[480, 640], [720, 1280], [640, 640], [640, 640]], dtype=np.float32)
+    offsets = np.array([
+        [0, 0], [0, 0], [-37 / ratio, 0], [0, -37 / ratio],
+    ], dtype=np.float32)
+
+    detector = PersonDetector(confidence_threshold=0.5)
+    results = detector.postprocess(boxes, classes, scores, scales, offsets)
+
+    assert len(results) == batch
+    assert len(results[2]) == 0
+    assert 0.5 in results[0][:, 4]
+    for i, result in enumerate(results):
+        expected = reference_postprocess(boxes[i], classes[i], scores[i], scales[i], offsets[i], 0.5)
+        assert result.dtype == np.float32
+        np.testing.assert_array_equal(result, expected)
@@ -0,0 +1,78 @@
+"""
+Tests for the SORT-style person tracker
+"""
+import numpy as np
+import pytest
+
+from app.models.tracker import PersonTracker
+
+
+def person(x, y, confidence=0.9):
+    """Detection row for a 40x80 person at (x, y)"""
+    return [x, y, 40, 80, confidence]
+
+
+def test_ids_stay_with_moving_persons():
+    tracker = PersonTracker()
+
+    for step in range(6):
+        tracks = tracker.update([person(100 + 5 * step, 100), person(400 - 5 * step, 200)], now=step)
+        # Each person keeps the ID it was first given
+        assert tracks[:, 5].tolist() == [1, 2]
+        np.testing.assert_allclose(tracks[:, 0], [100 + 5 * step, 400 - 5 * step], atol=3)
+
+    # A new person gets the next unused ID
+    tracker.update([person(130, 100), person(370, 200), person(250, 50)], now=6)
+    assert tracker.ids.tolist() == [1, 2, 3]
+
+
+def test_unmatched_tracks_age_out():
+    tracker = PersonTracker(max_age=2)
+    for step in range(3):
+        tracker.update([person(100, 100)], now=step)
+
+    # Missed tracks are kept for re-matching but not reported
+    for step in range(3, 5):
+        assert len(tracker.update([], now=step)) == 0
+        assert len(tracker.predict(now=step + 0.5)) == 0
+        assert len(tracker.extrapolate(now=step + 0.75)) == 0
+        assert tracker.ids.tolist() == [1]
+
+    # Re-matching within max_age recovers the same ID
+    tracks = tracker.update([person(100, 100)], now=5)
+    assert tracks[:, 5].tolist() == [1]
+
+    # One miss more than max_age removes the track
+    for step in range(6, 9):
+        tracker.update([], now=step)
+    assert tracker.ids.tolist() == []
+    tracker.update([person(100, 100)], now=9)
+    assert tracker.ids.tolist() == [2]
+
+
+def test_unconfirmed_tracks_are_hidden():
+    tracker = PersonTracker(min_hits=2)
+    for step in range(3):
+        tracker.update([person(100, 100)], now=step)
+
+    # A newcomer is shown only once it has been matched min_hits times
+    tracks = tracker.update([person(100, 100), person(400, 300)], now=3)
+    assert tracks[:, 5].tolist() == [1]
+    tracks = tracker.update([person(100, 100), person(400, 300)], now=4)
+    assert tracks[:, 5].tolist() == [1, 2]
+
+
+def test_count_is_smoothed():
+    tracker = PersonTracker(count_smoothing=0.5)
+
+    tracker.update([person(100, 100), person(400, 300)], now=0)
+    assert tracker.smoothed_count == pytest.approx(1.0)
+    tracker.update([person(100, 100), person(400, 300)], now=1)
+    assert tracker.smoothed_count == pytest.approx(1.5)
+    # Predictions between detections also feed the average
+    tracker.predict(now=1.5)
+    assert tracker.smoothed_count == pytest.approx(1.75)
+    assert tracker.count == 2
+
+    tracker.reset()
+    assert tracker.count == 0